@@ -1,8 +1,16 @@
-import requests     #to send request to GitHub API
-import csv     #to save data into CSV file
-import time   #to pause between requests (avoid rate limit)
-import os    #to read environment variables
+import argparse   #to read command line options
+import json   #to store the collection checkpoint
+import os    #to manage checkpoint and output files
+import shutil   #to clear the checkpoint of a previous run
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait   #to fetch pages in parallel
 from dotenv import load_dotenv  #to read secret GitHub token from .env file
+from csv_stream import AtomicCsvWriter   #to stream rows into CSV files
+from github_client import GitHubClient, GitHubError, ResponseCache, read_tokens   #rate-limit aware API client
+from graphql_backend import fetch_shard   #to collect through the GraphQL API
+from raw_archive import REPO_FIELDS, ArchiveWriter, archive_path, project   #to keep every raw response
+from repo_index import RepoIndex   #to write every repository once
+from shard_planner import SEARCH_RESULT_CAP, plan_shards   #to split queries past the 1000-result cap
+from tracing import span   #opt-in timing of each fetch (GITHUB_EDA_TRACE)
 
 # Load environment variables from .env file
 # This is used to securely read the GitHub token
@@ -12,21 +20,18 @@ load_dotenv()
 # 1. GITHUB AUTHENTICATION
 # ----------------------------------
 
-# Read GitHub Personal Access Token from environment variable
-# The token is not hardcoded for security reasons
-TOKEN = os.getenv("GITHUB_TOKEN")
-
-# Request headers including authorization
-headers = {
-    "Authorization": f"Bearer {TOKEN}"
-}
+# Read GitHub Personal Access Tokens from environment variables
+# GITHUB_TOKENS may list several comma separated tokens, the client
+# rotates between them; otherwise GITHUB_TOKEN is used
+# The tokens are not hardcoded for security reasons
+TOKENS = read_tokens()
 
 # ----------------------------------
 # 2. API CONFIGURATION
 # ----------------------------------
 
 # GitHub Search Repositories API endpoint
-url = "https://api.github.com/search/repositories"
+url = "/search/repositories"
 
 # List of programming languages to be analyzed
 languages = [
@@ -47,86 +52,322 @@ languages = [
 pages_per_language = 5
 repos_per_page = 100
 
+# Columns written to every language CSV file
+csv_columns = [column for column, _ in REPO_FIELDS]
+
+# Folder holding the shard plan and the log of completed units
+# A crashed or interrupted run can resume from here without refetching
+checkpoint_dir = "../data/raw/checkpoint"
+
+# Log of the ids of all written repositories (see repo_index.py)
+index_path = os.path.join(checkpoint_dir, "repo_index.bin")
+
+# Command line options
+parser = argparse.ArgumentParser(description="Collect GitHub repository data")
+parser.add_argument("--workers", type=int, default=4,
+                    help="number of pages fetched in parallel")
+parser.add_argument("--resume", action="store_true",
+                    help="only fetch units missing from the last run's checkpoint")
+parser.add_argument("--no-cache", action="store_true",
+                    help="do not revalidate requests against the on-disk response cache")
+parser.add_argument("--replay", action="store_true",
+                    help="serve every request from the response cache, without network")
+parser.add_argument("--backend", choices=["rest", "graphql"], default="rest",
+                    help="collect through REST search pages or GraphQL queries")
+parser.add_argument("--shard", action="store_true",
+                    help="split each language into created: date ranges to collect "
+                         "every repository instead of the top pages only")
+args = parser.parse_args()
+
 # ----------------------------------
 # 3. DATA COLLECTION PROCESS
 # ----------------------------------
 
-# Loop through each programming language
+# One shared client so every worker respects the same rate limit
+# Cached responses are revalidated with ETags, 304s are free
+cache = None if args.no_cache and not args.replay else ResponseCache()
+client = GitHubClient(TOKENS, cache=cache, replay=args.replay, pool_size=args.workers)
+
+
+def fetch_page(query, page):
+    # Query parameters for the API request
+    params = {
+        "q": query,                   # Filter repositories by language (and date shard)
+        "sort": "stars",              # Sort repositories by star count
+        "order": "desc",              # Highest stars first
+        "per_page": repos_per_page,   # Number of repositories per page
+        "page": page                  # Page number
+    }
+    data = client.get(url, params=params)
+
+    # Check if valid repository data is returned
+    if "items" not in data:
+        raise GitHubError(f"no items in response: {data}")
+    return data
+
+
+def save_json(path, data):
+    # Write to a temporary file first and rename it into place,
+    # so a crash never leaves a half-written checkpoint behind
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def shard_pages(shard):
+    # Number of pages needed to read a whole shard
+    # Search stops returning results after SEARCH_RESULT_CAP items
+    total = min(shard["total"], SEARCH_RESULT_CAP)
+    return max(1, -(-total // repos_per_page))
+
+
+def language_path(language):
+    # File path for saving language-specific data
+    return f"../data/raw/{language}_repos.csv"
+
+
+# A fresh run starts from an empty checkpoint, no partial files
+# and a new raw response archive
+if not args.resume:
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    for language in languages:
+        for path in (language_path(language) + ".part", archive_path(language)):
+            if os.path.exists(path):
+                os.remove(path)
+
+# The shard plan is checkpointed too, so a resumed run reuses it
+# instead of re-counting every date range
+# It is stored with the options it was planned from: units of a plan
+# made with other options (e.g. without --shard) do not match the
+# checkpointed ones, so resuming with changed options is refused
+plan_path = os.path.join(checkpoint_dir, "plan.json")
+plan_options = {
+    "languages": languages,
+    "shard": args.shard,
+    "pages_per_language": pages_per_language,
+    "repos_per_page": repos_per_page
+}
+if os.path.exists(plan_path):
+    saved = load_json(plan_path)
+    saved_options = saved.get("options") or {}
+    changed = [f"{key}: {saved_options.get(key)} -> {value}"
+               for key, value in plan_options.items() if saved_options.get(key) != value]
+    if changed:
+        raise SystemExit("Cannot resume, the checkpoint was planned with other options ("
+                         + ", ".join(changed) + ").\n"
+                         "Resume with the same options or run again without --resume.")
+    plan = saved["shards"]
+else:
+    plan = {}
+    for language in languages:
+        if args.shard:
+            print(f"Planning shards for: {language.upper()}")
+            plan[language] = plan_shards(client, language, workers=args.workers)
+            print(f"  {len(plan[language])} shards, {sum(s['total'] for s in plan[language])} repos")
+        else:
+            # Single query for the most starred repositories
+            plan[language] = [{
+                "name": "top",
+                "query": f"language:{language}",
+                "total": pages_per_language * repos_per_page
+            }]
+    save_json(plan_path, {"options": plan_options, "shards": plan})
+
+# The manifest has one line per completed unit with the size of the
+# language CSV and archive right after that unit was flushed to disk
+# A resumed run truncates both files back to their last offsets
+manifest_path = os.path.join(checkpoint_dir, "manifest.jsonl")
+done = set()
+offsets = {}
+archive_offsets = {}
+index_offset = None
+if os.path.exists(manifest_path):
+    with open(manifest_path, encoding="utf-8") as file:
+        for line in file:
+            entry = json.loads(line)
+            done.add((entry["language"], entry["shard"], entry["page"]))
+            offsets[entry["language"]] = max(offsets.get(entry["language"], 0), entry["offset"])
+            archive_offsets[entry["language"]] = max(
+                archive_offsets.get(entry["language"], 0), entry["archive_offset"]
+            )
+            index_offset = max(index_offset or 0, entry.get("index_offset", 0))
+
+# Every (language, shard, page) triple is an independent unit of work
+# Units already in the checkpoint are skipped when resuming
+units = [
+    (language, shard["name"], page)
+    for language in languages
+    for shard in plan[language]
+    for page in range(1, shard_pages(shard) + 1)
+]
+queries = {
+    (language, shard["name"]): shard["query"]
+    for language in languages
+    for shard in plan[language]
+}
+pending = [unit for unit in units if unit not in done]
+print(f"{len(units) - len(pending)} of {len(units)} units already checkpointed")
+
+# Units still to be written per language, used to know when a
+# language CSV is complete and can be moved into place
+remaining = {language: 0 for language in languages}
+for language, shard, page in pending:
+    remaining[language] += 1
+
+# A resumed run appends to the files the checkpoint points into
+# If one is missing or shorter than its checkpointed size, the rows
+# of the completed units would be lost, so the run stops instead
+damaged = []
+for language in languages:
+    if remaining[language] == 0:
+        continue
+    for path, offset in ((language_path(language) + ".part", offsets.get(language)),
+                         (archive_path(language), archive_offsets.get(language))):
+        if offset and (not os.path.exists(path) or os.path.getsize(path) < offset):
+            damaged.append(path)
+if pending and index_offset and (not os.path.exists(index_path) or os.path.getsize(index_path) < index_offset):
+    damaged.append(index_path)
+if damaged:
+    raise SystemExit("Cannot resume, checkpointed files are missing or truncated:\n  "
+                     + "\n  ".join(damaged) + "\nRun again without --resume to start over.")
+
+# ----------------------------------
+# 4. STREAM COLLECTED DATA TO CSV
+# ----------------------------------
+
+# Publish languages whose last unit was checkpointed by a run that
+# stopped before moving the file into place
 for language in languages:
-    print(f"\nCollecting data for: {language.upper()}")
-
-    # List to store all repositories for the current language
-    all_repos = []
-
-    # Loop through paginated API results
-    for page in range(1, pages_per_language + 1):
-        # Query parameters for the API request
-        params = {
-            "q": f"language:{language}",   # Filter repositories by language
-            "sort": "stars",              # Sort repositories by star count
-            "order": "desc",              # Highest stars first
-            "per_page": repos_per_page,   # Number of repositories per page
-            "page": page                  # Page number
-        }
-
-        # Send GET request to GitHub API
-        response = requests.get(url, headers=headers, params=params)
-        data = response.json()
-
-        # Check if valid repository data is returned
-        if "items" not in data:
-            print("Error fetching data:", data)
+    if remaining[language] == 0 and os.path.exists(language_path(language) + ".part"):
+        os.replace(language_path(language) + ".part", language_path(language))
+
+# Rows are appended to each language CSV as soon as a page arrives
+# Writers are opened lazily, one per language with pending units
+# The full API response is archived as well, so new columns can be
+# extracted later without refetching (see extract_archive.py)
+writers = {}
+archives = {}
+manifest = open(manifest_path, "a", encoding="utf-8")
+
+# One index for all languages and shards: a repository returned again
+# (overlapping shards, shifted pages, pages refetched after a resume)
+# is dropped before it reaches a CSV file
+repo_index = RepoIndex(index_path, resume_offset=index_offset)
+duplicates = 0
+
+
+def write_unit(language, shard, page, data):
+    if language not in archives:
+        # A language without checkpointed units is cut back to empty: a
+        # page left half-written by a crash would hide every page after it
+        archives[language] = ArchiveWriter(
+            archive_path(language), resume_offset=archive_offsets.get(language, 0)
+        )
+    archive_offset = archives[language].append(
+        data, language=language, shard=shard, query=queries[language, shard], page=page
+    )
+
+    global duplicates
+    items = [repo for repo in data["items"] if repo_index.add(repo.get("id"))]
+    duplicates += len(data["items"]) - len(items)
+    if language not in writers:
+        writers[language] = AtomicCsvWriter(
+            language_path(language), csv_columns, resume_offset=offsets.get(language)
+        )
+    writer = writers[language]
+    offset = writer.write_page([project(repo) for repo in items])
+
+    # The unit only counts as done once its rows and their ids are on disk
+    manifest.write(json.dumps({
+        "language": language, "shard": shard, "page": page,
+        "rows": len(items), "offset": offset, "archive_offset": archive_offset,
+        "index_offset": repo_index.sync()
+    }) + "\n")
+    manifest.flush()
+    os.fsync(manifest.fileno())
+
+    remaining[language] -= 1
+    if remaining[language] == 0:
+        writer.commit()
+        print(f"Saved {language.upper()} repositories to {language_path(language)}")
+
+
+def fetch_units(language, shard, pages):
+    # Fetch some pages of one shard, returns {page: response}
+    query = queries[language, shard]
+    with span("fetch_pages", language=language, shard=shard, pages=pages) as record:
+        if args.backend == "graphql":
+            # GraphQL pages are reached through cursors, so the shard is
+            # walked from its first page
+            responses = fetch_shard(client, query, max(pages), repos_per_page)
+            responses = {page: responses[page - 1] for page in pages}
+        else:
+            responses = {page: fetch_page(query, page) for page in pages}
+        record["rows_out"] = sum(len(data.get("items", [])) for data in responses.values() if data)
+    return responses
+
+
+# REST pages are fetched one per task; GraphQL fetches a whole shard
+# per task because its pages depend on each other's cursors
+tasks = {}
+for language, shard, page in pending:
+    key = (language, shard) if args.backend == "graphql" else (language, shard, page)
+    tasks.setdefault(key, (language, shard, []))[2].append(page)
+
+# Only a bounded number of tasks is in flight at any time, so peak
+# memory stays constant no matter how many units a language has
+failed = []
+task_queue = iter(tasks.values())
+in_flight = {}
+with ThreadPoolExecutor(max_workers=args.workers) as pool:
+    while True:
+        for language, shard, pages in task_queue:
+            future = pool.submit(fetch_units, language, shard, pages)
+            in_flight[future] = (language, shard, pages)
+            if len(in_flight) >= args.workers * 2:
+                break
+        if not in_flight:
             break
 
-        # Add repositories from the current page to the main list
-        all_repos.extend(data["items"])
-        print(f"  Page {page} collected ({len(data['items'])} repos)")
+        # The client paces all workers from the rate-limit response headers
+        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+            language, shard, pages = in_flight.pop(future)
+            try:
+                responses = future.result()
+            except GitHubError as error:
+                print(f"  Error fetching {language} {shard} pages {pages}:", error)
+                failed.extend((language, shard, page) for page in pages)
+                continue
 
-        # Pause between requests to avoid hitting API rate limits
-        time.sleep(1)
+            for page in pages:
+                data = responses[page]
+                write_unit(language, shard, page, data)
+                print(f"  {language.upper()} {shard} page {page} collected ({len(data['items'])} repos)")
 
-    # ----------------------------------
-    # 4. SAVE COLLECTED DATA TO CSV
-    # ----------------------------------
+manifest.close()
 
-    # File path for saving language-specific data
-    file_path = f"../data/raw/{language}_repos.csv"
-
-    # Open CSV file in write mode
-    with open(file_path, "w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-
-        # Write header row
-        writer.writerow([
-            "repo_name",
-            "language",
-            "created_at",
-            "updated_at",
-            "stargazers_count",
-            "forks_count",
-            "open_issues_count",
-            "watchers_count",
-            "size"
-        ])
-
-        # Write repository data rows
-        for repo in all_repos:
-            writer.writerow([
-                repo.get("name"),
-                repo.get("language"),
-                repo.get("created_at"),
-                repo.get("updated_at"),
-                repo.get("stargazers_count"),
-                repo.get("forks_count"),
-                repo.get("open_issues_count"),
-                repo.get("watchers_count"),
-                repo.get("size")
-            ])
-
-    print(f"Saved {len(all_repos)} repositories to {file_path}")
+# Languages with failed units keep their .part file for --resume
+for writer in writers.values():
+    writer.close()
+for archive in archives.values():
+    archive.close()
+repo_index.close()
 
 # ----------------------------------
 # 5. COMPLETION MESSAGE
 # ----------------------------------
 
-print("\nData collection completed for all languages.")
+print(f"\n{len(repo_index)} unique repositories written, {duplicates} duplicates skipped")
+if failed:
+    print(f"{len(failed)} units failed. Run again with --resume to fetch only the missing units.")
+else:
+    print("Data collection completed for all languages.")
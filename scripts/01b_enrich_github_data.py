@@ -0,0 +1,231 @@
+import argparse   #to read command line options
+import csv     #to save enrichment results
+import heapq   #to enrich the most starred repositories first
+import json   #to store the languages breakdown
+import os    #to manage output files
+import time   #to wait for GitHub to compute statistics
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait   #to enrich repositories in parallel
+from datetime import datetime, timezone   #to timestamp enrichment results
+from dotenv import load_dotenv  #to read secret GitHub token from .env file
+from github_client import GitHubClient, GitHubError, read_tokens   #rate-limit aware API client
+from raw_archive import find_archives, iter_repos   #to read repositories collected by step 1
+
+# -------------------------------------------------------
+# STEP 1b: Repository Enrichment
+# Adds per-repository data the search endpoint does not
+# return: contributors count, languages breakdown, commit
+# activity and latest release.
+#
+# Repositories are read from the raw archive written by
+# 01_collect_github_data.py and enriched in order of stars,
+# so the most valuable rows are done before quota runs out.
+# Repositories whose updated_at has not changed since their
+# last enrichment are skipped. A repository is only recorded
+# once all of its requests succeeded, so failed ones are tried
+# again by the next run.
+# -------------------------------------------------------
+
+load_dotenv()
+
+# ----------------------------------
+# 1. CONFIGURATION
+# ----------------------------------
+
+# Enrichment results, one row per repository (full_name)
+output_path = "../data/raw/enriched_repos.csv"
+
+output_columns = [
+    "full_name",
+    "updated_at",
+    "contributors_count",
+    "languages",
+    "commits_last_year",
+    "latest_release_tag",
+    "latest_release_at",
+    "enriched_at"
+]
+
+# Command line options
+parser = argparse.ArgumentParser(description="Enrich collected GitHub repositories")
+parser.add_argument("--workers", type=int, default=4,
+                    help="number of repositories enriched in parallel")
+parser.add_argument("--limit", type=int,
+                    help="enrich at most this many repositories in this run")
+args = parser.parse_args()
+
+client = GitHubClient(read_tokens(), pool_size=args.workers)
+
+# ----------------------------------
+# 2. PER-REPOSITORY REQUESTS
+# ----------------------------------
+
+def request_error(response):
+    # A sub-request that did not succeed fails the whole repository
+    return GitHubError(f"{response.status_code} for {response.url}: {response.text[:200]}")
+
+
+def last_page(response):
+    # Page number of rel="last" in the Link header, None if absent
+    link = response.links.get("last")
+    if not link:
+        return None
+    for part in link["url"].split("?", 1)[-1].split("&"):
+        key, _, value = part.partition("=")
+        if key == "page":
+            return int(value)
+    return None
+
+
+def contributors_count(full_name):
+    # With one contributor per page, the last page number is the count
+    response = client.request(f"/repos/{full_name}/contributors",
+                              params={"per_page": 1, "anon": "true"})
+    if response.status_code == 204:
+        # Empty repository
+        return 0
+    if response.status_code != 200:
+        raise request_error(response)
+    return last_page(response) or len(response.json())
+
+
+def languages(full_name):
+    # Bytes of code per language
+    response = client.request(f"/repos/{full_name}/languages")
+    if response.status_code != 200:
+        raise request_error(response)
+    return json.dumps(response.json())
+
+
+def commits_last_year(full_name, attempts=3):
+    # Weekly commit totals for the last 52 weeks
+    # GitHub answers 202 while it computes the statistics in the background
+    # and 204 for an empty repository
+    for attempt in range(attempts):
+        response = client.request(f"/repos/{full_name}/stats/commit_activity")
+        if response.status_code == 200:
+            return sum(week["total"] for week in response.json())
+        if response.status_code == 204:
+            return 0
+        if response.status_code != 202:
+            raise request_error(response)
+        time.sleep(2 ** attempt)
+    # Still being computed, the next run asks again
+    raise request_error(response)
+
+
+def latest_release(full_name):
+    # 404 means the repository has no published release
+    response = client.request(f"/repos/{full_name}/releases/latest")
+    if response.status_code == 404:
+        return None, None
+    if response.status_code != 200:
+        raise request_error(response)
+    release = response.json()
+    return release.get("tag_name"), release.get("published_at")
+
+
+def enrich(repo):
+    full_name = repo["full_name"]
+    tag, published_at = latest_release(full_name)
+    return {
+        "full_name": full_name,
+        "updated_at": repo["updated_at"],
+        "contributors_count": contributors_count(full_name),
+        "languages": languages(full_name),
+        "commits_last_year": commits_last_year(full_name),
+        "latest_release_tag": tag,
+        "latest_release_at": published_at,
+        "enriched_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+# ----------------------------------
+# 3. BUILD THE PRIORITY QUEUE
+# ----------------------------------
+
+# Previous results, the output file is an append-only log so the
+# last row of each repository wins
+previous = {}
+if os.path.exists(output_path):
+    with open(output_path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            previous[row["full_name"]] = row
+
+# Highest stars first; repositories unchanged since their last
+# enrichment are skipped
+queue = []
+seen = set()
+skipped = 0
+for language, path in find_archives().items():
+    for repo in iter_repos(path):
+        full_name = repo.get("full_name")
+        if not full_name or full_name in seen:
+            continue
+        seen.add(full_name)
+
+        if full_name in previous and previous[full_name]["updated_at"] == repo.get("updated_at"):
+            skipped += 1
+            continue
+
+        item = {"full_name": full_name, "updated_at": repo.get("updated_at")}
+        heapq.heappush(queue, (-(repo.get("stargazers_count") or 0), full_name, item))
+
+print(f"{len(queue)} repositories to enrich, {skipped} unchanged since last enrichment")
+
+if args.limit is not None:
+    queue = [heapq.heappop(queue) for _ in range(min(args.limit, len(queue)))]
+    heapq.heapify(queue)
+
+# ----------------------------------
+# 4. ENRICH WITH BOUNDED CONCURRENCY
+# ----------------------------------
+
+# Only `workers` repositories are in flight at once, so the queue
+# order is respected when quota runs short
+new_file = not os.path.exists(output_path)
+file = open(output_path, "a", newline="", encoding="utf-8")
+writer = csv.DictWriter(file, fieldnames=output_columns)
+if new_file:
+    writer.writeheader()
+
+enriched = 0
+failed = 0
+in_flight = {}
+with ThreadPoolExecutor(max_workers=args.workers) as pool:
+    while queue or in_flight:
+        while queue and len(in_flight) < args.workers:
+            _, full_name, item = heapq.heappop(queue)
+            in_flight[pool.submit(enrich, item)] = full_name
+
+        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+            full_name = in_flight.pop(future)
+            try:
+                result = future.result()
+            except GitHubError as error:
+                print(f"  Error enriching {full_name}:", error)
+                failed += 1
+                continue
+
+            # Append each result immediately so an interrupted run keeps it
+            writer.writerow(result)
+            file.flush()
+            previous[full_name] = result
+            enriched += 1
+            if enriched % 100 == 0:
+                print(f"  {enriched} repositories enriched")
+
+file.close()
+
+# ----------------------------------
+# 5. COMPACT THE OUTPUT FILE
+# ----------------------------------
+
+# Keep only the latest row of each repository, replaced atomically
+with open(output_path + ".tmp", "w", newline="", encoding="utf-8") as out:
+    compact_writer = csv.DictWriter(out, fieldnames=output_columns)
+    compact_writer.writeheader()
+    compact_writer.writerows(previous.values())
+os.replace(output_path + ".tmp", output_path)
+
+print(f"\nEnriched {enriched} repositories ({failed} failed), saved to {output_path}")
@@ -1,5 +1,9 @@
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
+from raw_archive import REPO_FIELDS, language_files
+from storage import TableWriter, csv_dtypes
+from tracing import file_size, span
 
 # ----------------------------------
 # 1. DATA FOLDER PATH
@@ -8,68 +12,82 @@ import os
 # Path where all language-wise CSV files are stored
 data_folder = "../data/raw"
 
+# Number of CSV files read in parallel
+max_workers = os.cpu_count() or 4
+
 # ----------------------------------
-# 2. CSV FILE MAPPING
+# 2. DISCOVER CSV FILES
 # ----------------------------------
 
-# Dictionary mapping programming languages to their CSV file names
-# Each file contains repository data collected from GitHub API
-files = {
-    "c": "c_repos.csv",
-    "c++": "c++_repos.csv",
-    "python": "python_repos.csv",
-    "java": "java_repos.csv",
-    "go": "go_repos.csv",
-    "rust": "rust_repos.csv",
-    "php": "php_repos.csv",
-    "javascript": "javascript_repos.csv",
-    "typescript": "typescript_repos.csv",
-    "c#": "c#_repos.csv"
-}
+# Path for the final merged file
+# (CSV, or Parquet with GITHUB_EDA_FORMAT=parquet)
+output_path = os.path.join(data_folder, "all_github_repos.csv")
+
+# Every <language>_repos.csv file written by the collector is merged,
+# the language is taken from the file name (the merged file itself and
+# enriched_repos.csv of step 1b are not language files)
+files = language_files(data_folder)
+
+# Columns of the merged file: the collector's columns plus the language
+# of the source file. Files written before a column was collected (e.g.
+# repo_id, full_name) get it empty, extra columns are left out
+merged_columns = [column for column, _ in REPO_FIELDS] + ["language_source"]
+
+print(f"Found {len(files)} CSV files to merge")
 
 # ----------------------------------
-# 3. READ AND STORE DATA
+# 3. READ DATA IN PARALLEL
 # ----------------------------------
 
-# List to store DataFrames from all CSV files
-all_data = []
+# Explicit column types instead of inferring them for every file
+dtypes = csv_dtypes()
+
 
-# Loop through each language and its corresponding CSV file
-for language, filename in files.items():
-    # Construct full file path
-    file_path = os.path.join(data_folder, filename)
-    
+def read_language_file(language, file_path):
     # Read CSV file into a DataFrame
-    df = pd.read_csv(file_path)
-    
+    with span("read_language_file", language=language, bytes_read=file_size(file_path)) as record:
+        df = pd.read_csv(file_path, dtype=dtypes)
+        record["rows_out"] = len(df)
+
     # Add a new column to identify the language source
     # This is important after merging all datasets
     df["language_source"] = language
-    
-    # Append DataFrame to the list
-    all_data.append(df)
+    return df
+
 
 # ----------------------------------
-# 4. MERGE ALL DATAFRAMES
+# 4. STREAM DATAFRAMES INTO ONE FILE
 # ----------------------------------
 
-# Combine all DataFrames into a single DataFrame
-# ignore_index=True resets the index after merging
-merged_df = pd.concat(all_data, ignore_index=True)
+writer = TableWriter(output_path, columns=merged_columns)
+
+# Files are read ahead by the pool but written in a stable order
+# Only a bounded window of DataFrames is in memory at any time
+with ThreadPoolExecutor(max_workers=max_workers) as pool:
+    pending = []
+    for language, file_path in files.items():
+        pending.append(pool.submit(read_language_file, language, file_path))
+        if len(pending) < max_workers * 2:
+            continue
+        df = pending.pop(0).result()
+        with span("write_language_rows", rows_in=len(df)):
+            writer.write(df)
+
+    for future in pending:
+        df = future.result()
+        with span("write_language_rows", rows_in=len(df)):
+            writer.write(df)
 
 # ----------------------------------
 # 5. SAVE MERGED DATASET
 # ----------------------------------
 
-# Path for the final merged CSV file
-output_path = os.path.join(data_folder, "all_github_repos.csv")
-
-# Save the merged DataFrame to a CSV file
-merged_df.to_csv(output_path, index=False)
+output_path = writer.commit()
 
 # ----------------------------------
 # 6. CONFIRMATION OUTPUT
 # ----------------------------------
 
 print("All CSV files merged successfully!")
-print(f"Final dataset shape: {merged_df.shape}")
+print(f"Final dataset shape: {(writer.rows, len(writer.columns))}")
+print(f"Saved to {output_path}")
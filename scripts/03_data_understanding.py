@@ -1,14 +1,27 @@
+import argparse
 import pandas as pd
+from dtypes import print_memory_report
+from profiler import BLOCK_BYTES, profile_file
 
 # -------------------------------------------------------
 # STEP 3: Data Understanding & Sanity Check
 # This script is used to understand the structure, quality,
 # and basic characteristics of the merged dataset before
 # performing data cleaning or exploratory analysis.
+# All checks below come from one streaming read of the file
+# (see profiler.py): blocks are profiled in parallel and
+# merged, so memory does not grow with the size of the file.
 # -------------------------------------------------------
 
-# Load the merged GitHub repository dataset from the data folder
-df = pd.read_csv("../data/raw/all_github_repos.csv")
+parser = argparse.ArgumentParser(description="Profile the merged GitHub dataset")
+parser.add_argument("--workers", type=int, help="blocks profiled in parallel (default: CPU count)")
+parser.add_argument("--block-mb", type=int, default=BLOCK_BYTES >> 20,
+                    help="size of the CSV blocks read by one worker, in MB")
+args = parser.parse_args()
+
+# Profile the merged GitHub repository dataset from the data folder
+profile = profile_file("../data/raw/all_github_repos.csv", workers=args.workers,
+                       block_bytes=args.block_mb << 20)
 
 # -------------------------------------------------------
 # 1. Check the shape of the dataset
@@ -16,7 +29,7 @@ df = pd.read_csv("../data/raw/all_github_repos.csv")
 # and columns (features) present in the dataset
 # -------------------------------------------------------
 print("Dataset Shape (Rows, Columns):")
-print(df.shape)
+print((profile.rows, len(profile.columns)))
 print("-" * 50)
 
 # -------------------------------------------------------
@@ -25,25 +38,30 @@ print("-" * 50)
 # available in the dataset
 # -------------------------------------------------------
 print("Column Names:")
-print(df.columns)
+print(pd.Index(profile.columns))
 print("-" * 50)
 
 # -------------------------------------------------------
 # 3. Inspect data types and non-null values
 # This provides information about each column,
 # including data type and presence of missing values
+# The memory report compares the schema types with the
+# compact types of dtypes.py (estimated from the value ranges)
 # -------------------------------------------------------
 print("Dataset Info:")
-df.info()
+print(profile.info())
+print("-" * 50)
+print_memory_report(profile.memory_usage(), profile.compact_memory_usage(), "merged dataset, estimated")
 print("-" * 50)
 
 # -------------------------------------------------------
 # 4. Generate statistical summary for numerical columns
 # This includes count, mean, standard deviation,
 # minimum, maximum, and percentile values
+# (percentiles are within 1% of the exact values)
 # -------------------------------------------------------
 print("Statistical Summary:")
-print(df.describe())
+print(profile.describe())
 print("-" * 50)
 
 # -------------------------------------------------------
@@ -52,23 +70,29 @@ print("-" * 50)
 # cleaning or special handling
 # -------------------------------------------------------
 print("Missing Values per Column:")
-print(df.isnull().sum())
+print(profile.null_counts())
 print("-" * 50)
 
 # -------------------------------------------------------
 # 6. Check for duplicate records
 # Duplicate rows can lead to biased analysis,
 # so it is important to detect them early
+# (estimated from a hash sample on very large files)
 # -------------------------------------------------------
-print("Duplicate Rows Count:")
-print(df.duplicated().sum())
+print("Duplicate Rows Count:" if profile.duplicates.exact() else "Duplicate Rows Count (estimated):")
+print(profile.duplicate_count())
 print("-" * 50)
 
 # -------------------------------------------------------
-# 7. Count unique programming languages
-# This provides an overview of the diversity of
-# programming languages in the dataset
+# 7. Count unique values
+# The number of programming languages gives an overview
+# of the diversity of the dataset
+# (counts above 16384 are estimated within about 0.5%)
 # -------------------------------------------------------
-if "language" in df.columns:
+print("Unique Values per Column:")
+print(profile.distinct_counts())
+print("-" * 50)
+
+if "language" in profile.columns:
     print("Total Unique Programming Languages:")
-    print(df["language"].nunique())
+    print(profile.distinct["language"].count())
@@ -1,4 +1,12 @@
+import argparse
 import pandas as pd
+from features import add_features, pinned_as_of
+from outliers import OUTLIER_METHODS, OUTLIER_SCOPES, outlier_mask, quantile_bounds, within_bounds
+from repo_index import RepoIndex
+from sketches import QuantileSketch
+from tracing import span
+from storage import (IDENTITY_COLUMNS, LEGACY_IDENTITY_COLUMNS, TableWriter, fill_missing_category,
+                     identity_columns, iter_table, read_table, write_table)
 
 # ==================================================
 # STEP 4: DATA CLEANING
@@ -7,133 +15,270 @@ import pandas as pd
 # Exploratory Data Analysis (EDA)
 # ==================================================
 
-# --------------------------------------------------
-# 1. Load the raw dataset
-# --------------------------------------------------
-# Reading the merged GitHub repository dataset
-df = pd.read_csv("../data/raw/all_github_repos.csv")
+input_path = "../data/raw/all_github_repos.csv"
+output_path = "../data/processed/cleaned_github_repos.csv"
+
+# Features added to the cleaned dataset (see features.py)
+cleaning_features = ["repo_age_days", "stars_per_day"]
+
+# Columns checked for outliers
+outlier_columns = ["stargazers_count", "forks_count", "size"]
+
+# With --chunksize the data is cleaned out of core (see section 0)
+# --outlier-scope language compares each repository with the bounds
+# of its own language instead of the bounds of the whole dataset
+parser = argparse.ArgumentParser(description="Clean the merged GitHub dataset")
+parser.add_argument("--chunksize", type=int,
+                    help="clean in chunks of this many rows, for data larger than memory")
+parser.add_argument("--outlier-method", choices=OUTLIER_METHODS, default="iqr",
+                    help="rule used to detect outliers")
+parser.add_argument("--outlier-scope", choices=OUTLIER_SCOPES, default="global",
+                    help="compute outlier bounds over all rows or per language")
+args = parser.parse_args()
+if args.chunksize and args.outlier_method == "mad":
+    # The MAD method needs exact medians, the chunked path only has sketches
+    parser.error("--outlier-method mad is not supported with --chunksize")
 
-# Display original shape of the dataset
-print("Original Dataset Shape:", df.shape)
-print("-" * 50)
+# Column whose groups get their own bounds (None = global bounds)
+outlier_by = "language" if args.outlier_scope == "language" else None
 
 # --------------------------------------------------
-# 2. Handle Missing Values
-# (Mandatory step even if data appears clean)
+# 0. Out-of-Core Cleaning (--chunksize)
 # --------------------------------------------------
+# Same steps as sections 1-9 below, in two streaming passes:
+#   pass 1 builds a quantile sketch per outlier column (and language)
+#   pass 2 filters with the sketched bounds and writes
+# Memory is bounded by the chunk size and the sketches (plus the id
+# of every distinct repository for duplicate removal)
+# Quantiles are within 1% of the exact values; the MAD method needs
+# exact medians and is only available in memory
 
-# Fill missing programming language values with 'Unknown'
-# This avoids issues during grouping and visualization
-df["language"] = df["language"].fillna("Unknown")
+def file_identity_columns(chunksize):
+    # identity_columns of the whole input file, as in section 3
+    # The GitHub id is only used when every row has one; the key is
+    # chosen once, so ids and name hashes never mix in one index
+    header = next(iter_table(input_path, 1)).columns
+    if not set(IDENTITY_COLUMNS) <= set(header):
+        return LEGACY_IDENTITY_COLUMNS
+    for chunk in iter_table(input_path, chunksize, columns=IDENTITY_COLUMNS):
+        if chunk.isna().any().any():
+            return LEGACY_IDENTITY_COLUMNS
+    return IDENTITY_COLUMNS
 
-# Fill missing numeric values with 0
-# These columns represent counts and size, so 0 is reasonable
-numeric_cols = ["stargazers_count", "forks_count", "size"]
-df[numeric_cols] = df[numeric_cols].fillna(0)
 
-# Verify missing values after handling
-print("Missing Values After Handling:")
-print(df.isnull().sum())
-print("-" * 50)
+def prepare_chunk(chunk, seen, key_columns):
+    # Missing values and duplicates, as in sections 2 and 3
+    chunk["language"] = fill_missing_category(chunk["language"], "Unknown")
+    chunk[["stargazers_count", "forks_count", "size"]] = (
+        chunk[["stargazers_count", "forks_count", "size"]].fillna(0)
+    )
 
-# --------------------------------------------------
-# 3. Remove Duplicate Repositories
-# --------------------------------------------------
-# Removing duplicate repositories based on
-# combination of repository name and language
-df = df.drop_duplicates(subset=["repo_name", "language"])
+    # Duplicates are found by GitHub id (or a hash of repo_name and
+    # language for older data), both within the chunk and against all
+    # earlier chunks, with one index lookup per row
+    if key_columns == IDENTITY_COLUMNS:
+        keys = chunk["repo_id"].to_numpy(dtype="int64")
+    else:
+        keys = pd.util.hash_pandas_object(chunk[key_columns], index=False).to_numpy()
+    keep = [seen.add(key) for key in keys.tolist()]
+    return chunk[keep]
 
-print("Dataset Shape After Removing Duplicates:", df.shape)
-print("-" * 50)
 
-# --------------------------------------------------
-# 4. Convert Date Columns to Datetime Format
-# --------------------------------------------------
-# Convert GitHub timestamp strings to datetime objects
-# UTC timezone is used to maintain consistency
-df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-df["updated_at"] = pd.to_datetime(df["updated_at"], utc=True)
+def sketch_groups(chunk):
+    # Rows of each outlier group in a chunk ("all" for global bounds)
+    if outlier_by is None:
+        return [("all", chunk)]
+    return list(chunk.groupby(outlier_by, observed=True))
 
-print("Date Columns Converted to Datetime")
-print("-" * 50)
 
-# --------------------------------------------------
-# 5. Remove Outliers (Using IQR Method)
-# --------------------------------------------------
-# Removing extreme values using Interquartile Range (IQR)
-# This ensures statistical robustness without arbitrary thresholds
+def chunk_bounds(chunk, bounds):
+    # Bounds of each row as frames aligned with the chunk
+    keys = chunk[outlier_by].astype(str) if outlier_by else pd.Series("all", index=chunk.index)
+    lower = pd.DataFrame({col: keys.map({k: b[0][col] for k, b in bounds.items()}) for col in outlier_columns})
+    upper = pd.DataFrame({col: keys.map({k: b[1][col] for k, b in bounds.items()}) for col in outlier_columns})
+    return lower, upper
 
-def remove_outliers_iqr(dataframe, column):
-    Q1 = dataframe[column].quantile(0.25)
-    Q3 = dataframe[column].quantile(0.75)
-    IQR = Q3 - Q1
 
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
+def clean_in_chunks(chunksize):
+    # Pass 1: quantile sketches of the outlier columns, per group
+    key_columns = file_identity_columns(chunksize)
+    sketches = {}
+    seen = RepoIndex()
+    rows_in = 0
+    with span("sketch_pass") as record:
+        for chunk in iter_table(input_path, chunksize):
+            rows_in += len(chunk)
+            chunk = prepare_chunk(chunk, seen, key_columns)
+            for key, rows in sketch_groups(chunk):
+                group = sketches.setdefault(str(key), {col: QuantileSketch() for col in outlier_columns})
+                for col in outlier_columns:
+                    group[col].add(rows[col].to_numpy(dtype="float64"))
+        record.update(rows_in=rows_in, rows_out=len(seen))
 
-    return dataframe[
-        (dataframe[column] >= lower_bound) &
-        (dataframe[column] <= upper_bound)
-    ]
+    print("Original Dataset Rows:", rows_in)
+    print("Rows After Removing Duplicates:", len(seen))
+    print("-" * 50)
 
-# Store original shape before removal
-original_shape = df.shape
+    # Bounds of each group from its sketched quantiles
+    bounds = {}
+    for key, group in sketches.items():
+        bounds[key] = quantile_bounds(
+            args.outlier_method,
+            lambda q: pd.Series({col: group[col].quantile(q) for col in outlier_columns})
+        )
+    print(f"Outlier bounds computed ({args.outlier_method}, {args.outlier_scope})")
+    print("-" * 50)
 
-# Apply outlier removal to key numerical columns
-for col in ["stargazers_count", "forks_count", "size"]:
-    df = remove_outliers_iqr(df, col)
+    # Pass 2: filter, add features and stream to the output file
+    as_of = pinned_as_of()
+    writer = TableWriter(output_path)
+    seen = RepoIndex()
+    with span("filter_pass") as record:
+        for chunk in iter_table(input_path, chunksize):
+            chunk = prepare_chunk(chunk, seen, key_columns)
 
-print("Outliers Removed Using IQR Method")
-print("Dataset Shape Before:", original_shape)
-print("Dataset Shape After:", df.shape)
-print("-" * 50)
+            lower, upper = chunk_bounds(chunk, bounds)
+            chunk = chunk[within_bounds(chunk, outlier_columns, lower, upper)]
 
-# --------------------------------------------------
-# 6. Standardize Column Names
-# --------------------------------------------------
-# Convert all column names to lowercase and remove spaces
-# This improves consistency and avoids coding errors
-df.columns = df.columns.str.lower().str.strip()
+            chunk.columns = chunk.columns.str.lower().str.strip()
+            add_features(chunk, cleaning_features, as_of)
+            writer.write(chunk)
+        record["rows_out"] = writer.rows
+
+    saved_path = writer.commit()
+    print(f"Cleaned dataset saved as '{saved_path}'")
+    print("Final Dataset Rows:", writer.rows)
 
-print("Column Names Standardized")
-print("-" * 50)
 
 # --------------------------------------------------
-# 7. Feature Engineering
+# In-Memory Cleaning (default)
 # --------------------------------------------------
-# Creating new features to support deeper analysis
+# Sections 1-9 on the whole dataset loaded at once
 
-# Calculate repository age in days
-df["repo_age_days"] = (
-    pd.Timestamp.now(tz="UTC") - df["created_at"]
-).dt.days
+def clean_in_memory():
+    # --------------------------------------------------
+    # 1. Load the raw dataset
+    # --------------------------------------------------
+    # Reading the merged GitHub repository dataset
+    # (typed columns: int64 counts, categorical language, UTC dates)
+    df = read_table(input_path)
 
-# Calculate average stars gained per day
-# This measures repository popularity growth
-df["stars_per_day"] = df["stargazers_count"] / df["repo_age_days"]
+    # Display original shape of the dataset
+    print("Original Dataset Shape:", df.shape)
+    print("-" * 50)
 
-print("New Features Created: repo_age_days, stars_per_day")
-print("-" * 50)
+    # --------------------------------------------------
+    # 2. Handle Missing Values
+    # (Mandatory step even if data appears clean)
+    # --------------------------------------------------
 
-# --------------------------------------------------
-# 8. Final Validation Checks
-# --------------------------------------------------
+    # Fill missing programming language values with 'Unknown'
+    # This avoids issues during grouping and visualization
+    df["language"] = fill_missing_category(df["language"], "Unknown")
 
-# Final missing values check
-print("Final Missing Values Check:")
-print(df.isnull().sum())
-print("-" * 50)
+    # Fill missing numeric values with 0
+    # These columns represent counts and size, so 0 is reasonable
+    numeric_cols = ["stargazers_count", "forks_count", "size"]
+    df[numeric_cols] = df[numeric_cols].fillna(0)
 
-# Final duplicate check
-print("Final Duplicate Check:")
-print(df.duplicated(subset=["repo_name", "language"]).sum())
-print("-" * 50)
+    # Verify missing values after handling
+    print("Missing Values After Handling:")
+    print(df.isnull().sum())
+    print("-" * 50)
+
+    # --------------------------------------------------
+    # 3. Remove Duplicate Repositories
+    # --------------------------------------------------
+    # Removing duplicate repositories based on their GitHub id
+    # Names are not unique (many repositories are called "docs"), so the
+    # combination of repository name and language is only used for data
+    # collected without ids
+    key_columns = identity_columns(df)
+    with span("drop_duplicates", rows_in=len(df), key=",".join(key_columns)) as record:
+        df = df.drop_duplicates(subset=key_columns)
+        record["rows_out"] = len(df)
+
+    print("Dataset Shape After Removing Duplicates:", df.shape)
+    print("-" * 50)
+
+    # --------------------------------------------------
+    # 4. Convert Date Columns to Datetime Format
+    # --------------------------------------------------
+    # Convert GitHub timestamp strings to datetime objects
+    # UTC timezone is used to maintain consistency
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    df["updated_at"] = pd.to_datetime(df["updated_at"], utc=True)
+
+    print("Date Columns Converted to Datetime")
+    print("-" * 50)
+
+    # --------------------------------------------------
+    # 5. Remove Outliers (IQR Method by Default)
+    # --------------------------------------------------
+    # Removing extreme values using Interquartile Range (IQR)
+    # This ensures statistical robustness without arbitrary thresholds
+    # The bounds of all key numerical columns are computed on the same
+    # rows and combined into one mask, so the data is filtered once
+    # With per-language bounds, languages with larger repositories (e.g.
+    # C/C++, Rust) are judged against their own spread
+
+    # Store original shape before removal
+    original_shape = df.shape
+
+    df = df[outlier_mask(df, outlier_columns, args.outlier_method, by=outlier_by)]
+
+    print(f"Outliers Removed Using {args.outlier_method.upper()} Method ({args.outlier_scope} bounds)")
+    print("Dataset Shape Before:", original_shape)
+    print("Dataset Shape After:", df.shape)
+    print("-" * 50)
+
+    # --------------------------------------------------
+    # 6. Standardize Column Names
+    # --------------------------------------------------
+    # Convert all column names to lowercase and remove spaces
+    # This improves consistency and avoids coding errors
+    df.columns = df.columns.str.lower().str.strip()
+
+    print("Column Names Standardized")
+    print("-" * 50)
+
+    # --------------------------------------------------
+    # 7. Feature Engineering
+    # --------------------------------------------------
+    # Creating new features to support deeper analysis
+    # repo_age_days: repository age in days
+    # stars_per_day: average stars gained per day (popularity growth)
+    # Both depend on the as-of date, so they are computed for every row
+    add_features(df, cleaning_features)
+
+    print("New Features Created:", ", ".join(cleaning_features))
+    print("-" * 50)
+
+    # --------------------------------------------------
+    # 8. Final Validation Checks
+    # --------------------------------------------------
+
+    # Final missing values check
+    print("Final Missing Values Check:")
+    print(df.isnull().sum())
+    print("-" * 50)
+
+    # Final duplicate check
+    print("Final Duplicate Check:")
+    print(df.duplicated(subset=key_columns).sum())
+    print("-" * 50)
+
+    # --------------------------------------------------
+    # 9. Save Cleaned Dataset
+    # --------------------------------------------------
+    # Saving cleaned dataset for EDA and visualization
+    saved_path = write_table(df, output_path)
+
+    print(f"Cleaned dataset saved as '{saved_path}'")
+    print("Final Dataset Shape:", df.shape)
 
-# --------------------------------------------------
-# 9. Save Cleaned Dataset
-# --------------------------------------------------
-# Saving cleaned dataset for EDA and visualization
-df.to_csv("../data/processed/cleaned_github_repos.csv", index=False)
 
-print("Cleaned dataset saved as 'cleaned_github_repos.csv'")
-print("Final Dataset Shape:", df.shape)
+if args.chunksize:
+    clean_in_chunks(args.chunksize)
+else:
+    clean_in_memory()
@@ -1,5 +1,9 @@
+import argparse
 import pandas as pd
-import numpy as np
+from aggregates import save_cube
+from features import FEATURES, add_features, pinned_as_of, update_features
+from loader import load_dataset
+from storage import identity_columns, table_exists, write_table
 
 # --------------------------------------------------
 # STEP 5: FEATURE ENGINEERING
@@ -8,97 +12,101 @@ import numpy as np
 # uncover deeper insights from the dataset.
 # --------------------------------------------------
 
+input_path = "../data/processed/cleaned_github_repos.csv"
+output_path = "../data/processed/featured_github_repos.csv"
+
+# With --incremental the features that do not depend on the as-of
+# date are only computed for new or changed repositories (see section 3)
+parser = argparse.ArgumentParser(description="Add features to the cleaned GitHub dataset")
+parser.add_argument("--incremental", action="store_true",
+                    help="copy the date-independent features of unchanged repositories "
+                         "from the last run (all rows are still loaded and written)")
+args = parser.parse_args()
+
 # 1. Load cleaned dataset
-df = pd.read_csv("../data/processed/cleaned_github_repos.csv")
+df = load_dataset(input_path)
 
 print("Dataset Loaded for Feature Engineering")
 print("Current Shape:", df.shape)
 print("-" * 50)
 
 # --------------------------------------------------
-# 2. Convert date columns to datetime (safety check)
+# 2. Check date columns (safety check)
 # --------------------------------------------------
-df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-df["updated_at"] = pd.to_datetime(df["updated_at"], utc=True)
+# The loader parses them as UTC datetimes
+for col in ["created_at", "updated_at"]:
+    if not isinstance(df[col].dtype, pd.DatetimeTZDtype):
+        raise TypeError(f"{col} must be parsed as a UTC datetime, got {df[col].dtype}")
 
 print("Date Columns Verified")
 print("-" * 50)
 
 # --------------------------------------------------
-# 3. Log Transformation (Reduce Skewness)
-# --------------------------------------------------
-# GitHub popularity metrics are highly right-skewed.
-# Log transformation stabilizes variance and improves analysis.
-
-df["log_stars"] = np.log1p(df["stargazers_count"])
-df["log_forks"] = np.log1p(df["forks_count"])
-df["log_watchers"] = np.log1p(df["watchers_count"])
-
-print("Log Features Created: log_stars, log_forks, log_watchers")
-print("-" * 50)
-
-# --------------------------------------------------
-# 4. Repository Age (in Years)
-# --------------------------------------------------
-# Shows how old the repository is
-df["repo_age_years"] = (
-    (pd.Timestamp.now(tz="UTC") - df["created_at"]).dt.days / 365
-).round(2)
-
-print("Feature Created: repo_age_years")
-print("-" * 50)
-
-# --------------------------------------------------
-# 5. Days Since Last Update
-# --------------------------------------------------
-# Indicates how recently the repository was active
-df["days_since_last_update"] = (
-    pd.Timestamp.now(tz="UTC") - df["updated_at"]
-).dt.days
-
-print("Feature Created: days_since_last_update")
+# 3. Compute Features
+# --------------------------------------------------
+# Features are defined in features.py, each with its input columns
+# - log_stars, log_forks, log_watchers: log transformation, reduces
+#   the skew of the popularity metrics
+# - repo_age_years: how old the repository is
+# - days_since_last_update: how recently the repository was active
+# - popularity_score: sum of the log metrics
+# - engagement_ratio: forks relative to stars
+# All time-based features share one as-of timestamp
+feature_names = [
+    "log_stars",
+    "log_forks",
+    "log_watchers",
+    "repo_age_years",
+    "days_since_last_update",
+    "popularity_score",
+    "engagement_ratio"
+]
+
+as_of = pinned_as_of()
+print("Features computed as of:", as_of)
+
+if args.incremental and table_exists(output_path):
+    # Features that do not depend on as_of are copied for repositories
+    # whose updated_at is unchanged since the previous run
+    # Scope: only those feature computations scale with the change set.
+    # Loading both datasets, matching the rows, the time-based features
+    # (recomputed for every row) and writing still cover the whole
+    # dataset, and with the cheap vectorized features of this step the
+    # copy costs about as much as recomputing them; it pays off for
+    # expensive features added to features.py
+    previous = load_dataset(output_path)
+    changed = update_features(df, previous, feature_names, identity_columns(df, previous), as_of)
+    print(f"Incremental update: {changed} of {len(df)} repositories new or changed")
+    created = feature_names
+else:
+    created = add_features(df, feature_names, as_of)
+
+for name in created:
+    print(f"Feature Created: {name} (from {', '.join(FEATURES[name]['inputs'])})")
 print("-" * 50)
 
 # --------------------------------------------------
-# 6. Popularity Score (Log-Based)
+# 4. Final Validation
 # --------------------------------------------------
-# Combined popularity using log-transformed metrics
-# Prevents extreme repositories from dominating analysis
-
-df["popularity_score"] = (
-    df["log_stars"]
-    + df["log_forks"]
-    + df["log_watchers"]
-).round(3)
-
-print("Feature Created: popularity_score (log-based)")
+print("Final Missing Values Check:")
+print(df.isnull().sum())
 print("-" * 50)
 
 # --------------------------------------------------
-# 7. Engagement Ratio
+# 5. Save Feature-Engineered Dataset
 # --------------------------------------------------
-# Measures contributor activity relative to popularity
-# +1 avoids division-by-zero errors
-
-df["engagement_ratio"] = (
-    df["forks_count"] / (df["stargazers_count"] + 1)
-).round(3)
-
-print("Feature Created: engagement_ratio")
-print("-" * 50)
+saved_path = write_table(df, output_path)
 
-# --------------------------------------------------
-# 8. Final Validation
-# --------------------------------------------------
-print("Final Missing Values Check:")
-print(df.isnull().sum())
+print(f"Feature-engineered dataset saved as '{saved_path}'")
+print("Final Dataset Shape:", df.shape)
 print("-" * 50)
 
 # --------------------------------------------------
-# 9. Save Feature-Engineered Dataset
+# 6. Save Per-Language Aggregates
 # --------------------------------------------------
-df.to_csv("../data/processed/featured_github_repos.csv", index=False)
+# Counts and sums per (language, created_year), read by the
+# bar and line charts of steps 6 and 7 (see aggregates.py)
+cube_path = save_cube(df)
 
-print("Feature-engineered dataset saved as 'featured_github_repos.csv'")
-print("Final Dataset Shape:", df.shape)
+print(f"Per-language aggregates saved as '{cube_path}'")
 print("-" * 50)
\ No newline at end of file
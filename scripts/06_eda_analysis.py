@@ -1,7 +1,12 @@
+import argparse
+import os
+from figures import RENDER_MODES, draw_scatter, job, render_all, scatter_data   #sets the non-interactive backend before pyplot
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import os
+from aggregates import activity_counts, by_language, load_cube, repos_per_year
+from loader import load_dataset
 
 # --------------------------------------------------
 # STEP 6: EXPLORATORY DATA ANALYSIS (EDA)
@@ -14,196 +19,197 @@ import os
 # - Time-based trends
 # - Repository activity patterns
 # - Correlation between repository metrics
+#
+# Each figure is a render function plus the data it needs;
+# figures render in parallel and are skipped when their data
+# and code are unchanged (see figures.py)
 # --------------------------------------------------
 
-# Create directory for plots
-os.makedirs("../plots", exist_ok=True)
-
-# Load dataset
-df = pd.read_csv("../data/processed/featured_github_repos.csv")
-
-# Convert dates
-df["created_at"] = pd.to_datetime(df["created_at"])
-df["updated_at"] = pd.to_datetime(df["updated_at"])
-
-# Handle missing languages
-df["language"] = df["language"].fillna("Unknown")
-
 # Set theme
 sns.set(style="whitegrid")
 
+
 # ==================================================
 # FIGURE 1: LANGUAGE POPULARITY & DISTRIBUTION
 # ==================================================
 
-fig, axes = plt.subplots(2, 2, figsize=(16, 10))
-fig.suptitle("Language Popularity and Repository Distribution", fontsize=16)
-
-# Total Stars by Language
-stars_by_language = (
-    df.groupby("language")["stargazers_count"]
-    .sum()
-    .sort_values(ascending=False)
-)
-stars_by_language.plot(kind="bar", ax=axes[0, 0])
-axes[0, 0].set_title("Total Stars by Language")
-axes[0, 0].set_xlabel("Language")
-axes[0, 0].set_ylabel("Total Stars")
-axes[0, 0].tick_params(axis="x", rotation=45)
-
-# Average Stars per Repo
-avg_stars = (
-    df.groupby("language")["stargazers_count"]
-    .mean()
-    .sort_values(ascending=False)
-)
-avg_stars.plot(kind="bar", ax=axes[0, 1])
-axes[0, 1].set_title("Average Stars per Repository")
-axes[0, 1].set_xlabel("Language")
-axes[0, 1].set_ylabel("Average Stars")
-axes[0, 1].tick_params(axis="x", rotation=45)
-
-# Log-Stars Distribution
-axes[1, 0].hist(df["log_stars"], bins=30)
-axes[1, 0].set_title("Distribution of Log(Stars)")
-axes[1, 0].set_xlabel("Log(Stars)")
-axes[1, 0].set_ylabel("Repository Count")
-
-# Log Stars vs Log Forks
-axes[1, 1].scatter(df["log_stars"], df["log_forks"], alpha=0.6)
-axes[1, 1].set_title("Forks vs Stars (Log Scale)")
-axes[1, 1].set_xlabel("Log(Stars)")
-axes[1, 1].set_ylabel("Log(Forks)")
-
-plt.tight_layout(rect=[0, 0, 1, 0.95])
-plt.savefig("../plots/figure_1_language_popularity.png", dpi=300)
-plt.show()
+def render_language_popularity(data, spec, path):
+    fig, axes = plt.subplots(2, 2, figsize=(16, 10))
+    fig.suptitle("Language Popularity and Repository Distribution", fontsize=16)
+
+    # Total Stars by Language
+    data["stars_by_language"].plot(kind="bar", ax=axes[0, 0])
+    axes[0, 0].set_title("Total Stars by Language")
+    axes[0, 0].set_xlabel("Language")
+    axes[0, 0].set_ylabel("Total Stars")
+    axes[0, 0].tick_params(axis="x", rotation=45)
+
+    # Average Stars per Repo
+    data["avg_stars"].plot(kind="bar", ax=axes[0, 1])
+    axes[0, 1].set_title("Average Stars per Repository")
+    axes[0, 1].set_xlabel("Language")
+    axes[0, 1].set_ylabel("Average Stars")
+    axes[0, 1].tick_params(axis="x", rotation=45)
+
+    # Log-Stars Distribution (counts are binned before rendering)
+    counts, edges = data["log_stars_hist"]["count"], data["log_stars_edges"]["edge"]
+    axes[1, 0].hist(edges[:-1], bins=edges, weights=counts)
+    axes[1, 0].set_title("Distribution of Log(Stars)")
+    axes[1, 0].set_xlabel("Log(Stars)")
+    axes[1, 0].set_ylabel("Repository Count")
+
+    # Log Stars vs Log Forks (a density grid for large datasets)
+    if spec.get("density"):
+        draw_scatter(axes[1, 1], data["points"], spec, "log_stars", "log_forks")
+    else:
+        axes[1, 1].scatter(data["points"]["log_stars"], data["points"]["log_forks"], alpha=0.6)
+    axes[1, 1].set_title("Forks vs Stars (Log Scale)")
+    axes[1, 1].set_xlabel("Log(Stars)")
+    axes[1, 1].set_ylabel("Log(Forks)")
+
+    plt.tight_layout(rect=[0, 0, 1, 0.95])
+    plt.savefig(path, dpi=spec["dpi"])
+    plt.close(fig)
 
 
 # ==================================================
 # FIGURE 2: TIME-BASED & ACTIVITY ANALYSIS
 # ==================================================
 
-fig, axes = plt.subplots(2, 2, figsize=(16, 10))
-fig.suptitle("Time-Based Trends and Repository Activity", fontsize=16)
-
-# Repositories Created Per Year
-df["created_year"] = df["created_at"].dt.year
-repos_per_year = df["created_year"].value_counts().sort_index()
-repos_per_year.plot(kind="line", marker="o", ax=axes[0, 0])
-axes[0, 0].set_title("Repositories Created Per Year")
-axes[0, 0].set_xlabel("Year")
-axes[0, 0].set_ylabel("Number of Repositories")
-
-# Average Days Since Last Update by Language
-activity_trend = (
-    df.groupby("language")["days_since_last_update"]
-    .mean()
-    .sort_values()
-)
-activity_trend.plot(kind="bar", ax=axes[0, 1])
-axes[0, 1].set_title("Average Days Since Last Update by Language")
-axes[0, 1].set_xlabel("Language")
-axes[0, 1].set_ylabel("Days Since Last Update")
-axes[0, 1].tick_params(axis="x", rotation=45)
-
-# Active vs Inactive
-df["activity_status"] = df["days_since_last_update"].apply(
-    lambda x: "Active" if x <= 180 else "Inactive"
-)
-activity_count = df["activity_status"].value_counts()
-activity_count.plot(kind="bar", ax=axes[1, 0])
-axes[1, 0].set_title("Active vs Inactive Repositories")
-axes[1, 0].set_xlabel("Status")
-axes[1, 0].set_ylabel("Count")
-
-# Recently Updated Repos (Last 90 Days)
-recent_repos = df[df["days_since_last_update"] <= 90]
-recent_by_language = recent_repos["language"].value_counts()
-recent_by_language.plot(kind="bar", ax=axes[1, 1])
-axes[1, 1].set_title("Recently Updated Repositories by Language")
-axes[1, 1].set_xlabel("Language")
-axes[1, 1].set_ylabel("Repository Count")
-axes[1, 1].tick_params(axis="x", rotation=45)
-
-plt.tight_layout(rect=[0, 0, 1, 0.95])
-plt.savefig("../plots/figure_2_time_activity_analysis.png", dpi=300)
-plt.show()
+def render_time_activity(data, spec, path):
+    fig, axes = plt.subplots(2, 2, figsize=(16, 10))
+    fig.suptitle("Time-Based Trends and Repository Activity", fontsize=16)
+
+    # Repositories Created Per Year
+    data["repos_per_year"].plot(kind="line", marker="o", ax=axes[0, 0])
+    axes[0, 0].set_title("Repositories Created Per Year")
+    axes[0, 0].set_xlabel("Year")
+    axes[0, 0].set_ylabel("Number of Repositories")
+
+    # Average Days Since Last Update by Language
+    data["activity_trend"].plot(kind="bar", ax=axes[0, 1])
+    axes[0, 1].set_title("Average Days Since Last Update by Language")
+    axes[0, 1].set_xlabel("Language")
+    axes[0, 1].set_ylabel("Days Since Last Update")
+    axes[0, 1].tick_params(axis="x", rotation=45)
+
+    # Active vs Inactive
+    data["activity_count"].plot(kind="bar", ax=axes[1, 0])
+    axes[1, 0].set_title("Active vs Inactive Repositories")
+    axes[1, 0].set_xlabel("Status")
+    axes[1, 0].set_ylabel("Count")
+
+    # Recently Updated Repos (Last 90 Days)
+    data["recent_by_language"].plot(kind="bar", ax=axes[1, 1])
+    axes[1, 1].set_title("Recently Updated Repositories by Language")
+    axes[1, 1].set_xlabel("Language")
+    axes[1, 1].set_ylabel("Repository Count")
+    axes[1, 1].tick_params(axis="x", rotation=45)
+
+    plt.tight_layout(rect=[0, 0, 1, 0.95])
+    plt.savefig(path, dpi=spec["dpi"])
+    plt.close(fig)
 
 
 # ==================================================
 # FIGURE 3: DISTRIBUTION & CORRELATION
 # ==================================================
 
-fig, axes = plt.subplots(1, 2, figsize=(16, 6))
-fig.suptitle("Stars Distribution and Correlation Analysis", fontsize=16)
-
-# Boxplot (Log Stars by Language)
-sns.boxplot(
-    x="language",
-    y="log_stars",
-    data=df,
-    ax=axes[0]
-)
-axes[0].set_title("Log(Stars) Distribution by Language")
-axes[0].set_xlabel("Language")
-axes[0].set_ylabel("Log(Stars)")
-axes[0].tick_params(axis="x", rotation=45)
-
-# Correlation Heatmap (Using Log Features)
-corr_cols = [
-    "log_stars",
-    "log_forks",
-    "open_issues_count",
-    "log_watchers",
-    "popularity_score"
-]
-
-corr_matrix = df[corr_cols].corr()
-
-sns.heatmap(
-    corr_matrix,
-    annot=True,
-    cmap="coolwarm",
-    ax=axes[1]
-)
-axes[1].set_title("Correlation Heatmap of Repository Metrics")
-
-plt.tight_layout(rect=[0, 0, 1, 0.95])
-plt.savefig("../plots/figure_3_distribution_correlation.png", dpi=300)
-plt.show()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+def render_distribution_correlation(data, spec, path):
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    fig.suptitle("Stars Distribution and Correlation Analysis", fontsize=16)
+
+    # Boxplot (Log Stars by Language)
+    # Languages in the order of the data, as before language was categorical
+    rows = data["rows"]
+    sns.boxplot(
+        x="language",
+        y="log_stars",
+        data=rows,
+        order=list(rows["language"].astype(str).unique()),
+        ax=axes[0]
+    )
+    axes[0].set_title("Log(Stars) Distribution by Language")
+    axes[0].set_xlabel("Language")
+    axes[0].set_ylabel("Log(Stars)")
+    axes[0].tick_params(axis="x", rotation=45)
+
+    # Correlation Heatmap (Using Log Features)
+    sns.heatmap(
+        data["corr_matrix"],
+        annot=True,
+        cmap="coolwarm",
+        ax=axes[1]
+    )
+    axes[1].set_title("Correlation Heatmap of Repository Metrics")
+
+    plt.tight_layout(rect=[0, 0, 1, 0.95])
+    plt.savefig(path, dpi=spec["dpi"])
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the EDA figures")
+    parser.add_argument("--workers", type=int, help="figures rendered in parallel (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-render figures that are up to date")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="auto",
+                        help="draw scatter plots point by point or from a density grid")
+    args = parser.parse_args()
+
+    # Create directory for plots
+    os.makedirs("../plots", exist_ok=True)
+
+    # Load dataset (only the columns used by the row-level figures)
+    # (missing languages come back as "Unknown", types are narrowed)
+    df = load_dataset("../data/processed/featured_github_repos.csv", optimize=True, columns=[
+        "language",
+        "open_issues_count",
+        "log_stars",
+        "log_forks",
+        "log_watchers",
+        "popularity_score"
+    ])
+
+    # Per-language and per-year statistics come from the aggregate cube
+    # written by step 5, the bar and line charts do not group the rows
+    cube = load_cube()
+    language_stats = by_language(cube)
+
+    # Correlation of the log features
+    corr_cols = [
+        "log_stars",
+        "log_forks",
+        "open_issues_count",
+        "log_watchers",
+        "popularity_score"
+    ]
+    corr_matrix = df[corr_cols].corr()
+
+    # Histogram counts of log(stars) and the (possibly binned) scatter points
+    counts, edges = np.histogram(df["log_stars"].dropna(), bins=30)
+    points, density_spec = scatter_data(df, "log_stars", "log_forks", mode=args.render_mode)
+
+    # Each job gets only the data its figure draws
+    jobs = [
+        job(render_language_popularity, "../plots/figure_1_language_popularity.png", {
+            "stars_by_language": language_stats["stargazers_count_sum"].sort_values(ascending=False),
+            "avg_stars": language_stats["stargazers_count_mean"].sort_values(ascending=False),
+            "log_stars_hist": pd.DataFrame({"count": counts}),
+            "log_stars_edges": pd.DataFrame({"edge": edges}),
+            "points": points
+        }, dpi=300, **density_spec),
+        job(render_time_activity, "../plots/figure_2_time_activity_analysis.png", {
+            "repos_per_year": repos_per_year(cube),
+            "activity_trend": language_stats["days_since_last_update_mean"].sort_values(),
+            # Updated within 180 days or not
+            "activity_count": activity_counts(cube),
+            "recent_by_language": language_stats["recent_count"].sort_values(ascending=False)
+        }, dpi=300),
+        job(render_distribution_correlation, "../plots/figure_3_distribution_correlation.png", {
+            "rows": df[["language", "log_stars"]],
+            "corr_matrix": corr_matrix
+        }, dpi=300)
+    ]
+
+    rendered, skipped = render_all(jobs, workers=args.workers, force=args.force)
+    print(f"EDA figures: {rendered} rendered, {skipped} unchanged")
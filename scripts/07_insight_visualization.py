@@ -1,240 +1,238 @@
+import argparse
 import pandas as pd
+from figures import RENDER_MODES, draw_scatter, job, render_all, scatter_data   #sets the non-interactive backend before pyplot
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from aggregates import by_language, load_cube
+from loader import load_dataset
 
 # -------------------------
 # Configuration
 # -------------------------
 sns.set(style="whitegrid")
 plots_dir = "../plots/"
-os.makedirs(plots_dir, exist_ok=True)
+
+# Each figure is a job: a render function below, the data slice it
+# draws and its titles. Jobs render in parallel and are skipped when
+# nothing they depend on has changed (see figures.py)
+
 
 # -------------------------
-# Load Data
+# Render Functions
 # -------------------------
-df = pd.read_csv("../data/processed/featured_github_repos.csv")
-
-# Handle missing languages
-df["language"] = df["language"].fillna("Unknown")
-
-# Convert dates
-df["created_at"] = pd.to_datetime(df["created_at"])
-df["updated_at"] = pd.to_datetime(df["updated_at"])
-
-# ==================================================
-# 1. Average Stars per Language
-# ==================================================
-language_popularity = (
-    df.groupby("language")["stargazers_count"]
-    .mean()
-    .sort_values(ascending=False)
-)
-
-plt.figure(figsize=(10, 6))
-sns.barplot(x=language_popularity.index, y=language_popularity.values)
-plt.title("Average Stars per Language")
-plt.ylabel("Average Stars")
-plt.xlabel("Language")
-plt.xticks(rotation=45)
-plt.savefig(f"{plots_dir}/01_language_popularity.png")
-plt.close()
-
-# ==================================================
-# 2. Average Watchers per Language
-# ==================================================
-watchers_per_language = (
-    df.groupby("language")["watchers_count"]
-    .mean()
-    .sort_values(ascending=False)
-)
-
-plt.figure(figsize=(10, 6))
-sns.barplot(x=watchers_per_language.index, y=watchers_per_language.values)
-plt.title("Average Watchers per Language")
-plt.ylabel("Average Watchers")
-plt.xlabel("Language")
-plt.xticks(rotation=45)
-plt.savefig(f"{plots_dir}/02_watchers_comparison.png")
-plt.close()
-
-# ==================================================
-# 3. Engagement Ratio per Language
-# ==================================================
-engagement_per_language = (
-    df.groupby("language")["engagement_ratio"]
-    .mean()
-    .sort_values(ascending=False)
-)
-
-plt.figure(figsize=(10, 6))
-sns.barplot(x=engagement_per_language.index, y=engagement_per_language.values)
-plt.title("Average Engagement Ratio per Language")
-plt.ylabel("Engagement Ratio")
-plt.xlabel("Language")
-plt.xticks(rotation=45)
-plt.savefig(f"{plots_dir}/03_engagement_ratio.png")
-plt.close()
-
-# ==================================================
-# 4. Rust: Stars per Day vs Forks
-# ==================================================
-rust_df = df[df["language"] == "Rust"]
-
-plt.figure(figsize=(10, 6))
-sns.scatterplot(data=rust_df, x="stars_per_day", y="forks_count")
-plt.title("Rust: Stars per Day vs Forks")
-plt.xlabel("Stars per Day")
-plt.ylabel("Forks")
-plt.savefig(f"{plots_dir}/04_rust_focus.png")
-plt.close()
-
-# ==================================================
-# 5. PHP Maintenance Pressure
-# ==================================================
-php_df = df[df["language"] == "PHP"]
-
-top_php = php_df.sort_values(
-    by="open_issues_count",
-    ascending=False
-).head(10)
-
-plt.figure(figsize=(10, 6))
-sns.barplot(x="open_issues_count", y="repo_name", data=top_php)
-plt.title("Top 10 PHP Repositories by Open Issues")
-plt.xlabel("Open Issues")
-plt.ylabel("Repository")
-plt.savefig(f"{plots_dir}/05_php_maintenance.png")
-plt.close()
-
-# ==================================================
-# 6. C & C++ Stability
-# ==================================================
-c_df = df[df["language"].isin(["C", "C++"])]
-
-plt.figure(figsize=(10, 6))
-sns.scatterplot(
-    data=c_df,
-    x="repo_age_days",
-    y="engagement_ratio",
-    hue="language"
-)
-plt.title("C & C++: Repository Age vs Engagement")
-plt.xlabel("Repository Age (Days)")
-plt.ylabel("Engagement Ratio")
-plt.savefig(f"{plots_dir}/06_c_cpp_stability.png")
-plt.close()
-
-# ==================================================
-# 7. Popularity vs Maintenance (Log Scale)
-# ==================================================
-plt.figure(figsize=(10, 6))
-sns.scatterplot(
-    data=df,
-    x="log_stars",
-    y="open_issues_count",
-    hue="language"
-)
-plt.title("Log(Stars) vs Open Issues")
-plt.xlabel("Log(Stars)")
-plt.ylabel("Open Issues")
-plt.savefig(f"{plots_dir}/07_popularity_vs_issues.png")
-plt.close()
-
-# ==================================================
-# 8. Star Growth per Language
-# ==================================================
-stars_per_day_language = (
-    df.groupby("language")["stars_per_day"]
-    .mean()
-    .sort_values(ascending=False)
-)
-
-plt.figure(figsize=(10, 6))
-sns.barplot(
-    x=stars_per_day_language.index,
-    y=stars_per_day_language.values
-)
-plt.title("Average Stars per Day per Language")
-plt.ylabel("Stars per Day")
-plt.xlabel("Language")
-plt.xticks(rotation=45)
-plt.savefig(f"{plots_dir}/08_star_growth.png")
-plt.close()
-
-# ==================================================
-# 9. Forks vs Stars (Log Scale)
-# ==================================================
-plt.figure(figsize=(10, 6))
-sns.scatterplot(
-    data=df,
-    x="log_stars",
-    y="log_forks",
-    hue="language"
-)
-plt.title("Log(Stars) vs Log(Forks)")
-plt.xlabel("Log(Stars)")
-plt.ylabel("Log(Forks)")
-plt.savefig(f"{plots_dir}/09_fork_behavior.png")
-plt.close()
-
-# ==================================================
-# 10. Ecosystem Size vs Engagement
-# ==================================================
-repo_count = df["language"].value_counts()
-engagement_avg = df.groupby("language")["engagement_ratio"].mean()
-
-eco_df = pd.DataFrame({
-    "language": repo_count.index,
-    "repo_count": repo_count.values,
-    "engagement": engagement_avg.values
-})
-
-plt.figure(figsize=(10, 6))
-sns.scatterplot(
-    data=eco_df,
-    x="repo_count",
-    y="engagement",
-    size="repo_count",
-    sizes=(200, 1200),
-    hue="language"
-)
-plt.title("Ecosystem Size vs Engagement")
-plt.xlabel("Number of Repositories")
-plt.ylabel("Average Engagement Ratio")
-plt.savefig(f"{plots_dir}/10_ecosystem_size_vs_quality.png")
-plt.close()
-
-# ==================================================
-# 11. Repository Age vs Popularity (Log Scale)
-# ==================================================
-plt.figure(figsize=(10, 6))
-sns.scatterplot(
-    data=df,
-    x="repo_age_years",
-    y="log_stars",
-    hue="language"
-)
-plt.title("Repository Age vs Log(Stars)")
-plt.xlabel("Repository Age (Years)")
-plt.ylabel("Log(Stars)")
-plt.savefig(f"{plots_dir}/11_age_vs_popularity.png")
-plt.close()
-
-# ==================================================
-# 12. Activity Load
-# ==================================================
-plt.figure(figsize=(10, 6))
-sns.scatterplot(
-    data=df,
-    x="days_since_last_update",
-    y="open_issues_count",
-    hue="language"
-)
-plt.title("Days Since Last Update vs Open Issues")
-plt.xlabel("Days Since Last Update")
-plt.ylabel("Open Issues")
-plt.savefig(f"{plots_dir}/12_activity_load.png")
-plt.close()
-
-print("All 12 final insight visualizations generated successfully!")
\ No newline at end of file
+
+def render_bar(data, spec, path):
+    # Per-language bar chart of a Series indexed by language
+    # Bars follow the order of the Series (e.g. sorted by value), not the
+    # alphabetical order of the categorical language index
+    labels = data.index.astype(str)
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x=labels, y=data.values, order=list(labels))
+    plt.title(spec["title"])
+    plt.ylabel(spec["ylabel"])
+    plt.xlabel(spec["xlabel"])
+    plt.xticks(rotation=45)
+    plt.savefig(path)
+    plt.close()
+
+
+def render_scatter(data, spec, path):
+    # Scatter plot of two columns, colored by `hue` when given
+    # (drawn from a density grid when the job data was binned)
+    plt.figure(figsize=(10, 6))
+    draw_scatter(plt.gca(), data, spec, spec["x"], spec["y"], spec.get("hue"))
+    plt.title(spec["title"])
+    plt.xlabel(spec["xlabel"])
+    plt.ylabel(spec["ylabel"])
+    plt.savefig(path)
+    plt.close()
+
+
+def render_top_issues(data, spec, path):
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x="open_issues_count", y="repo_name", data=data)
+    plt.title(spec["title"])
+    plt.xlabel("Open Issues")
+    plt.ylabel("Repository")
+    plt.savefig(path)
+    plt.close()
+
+
+def render_ecosystem(data, spec, path):
+    plt.figure(figsize=(10, 6))
+    sns.scatterplot(
+        data=data,
+        x="repo_count",
+        y="engagement",
+        size="repo_count",
+        sizes=(200, 1200),
+        hue="language"
+    )
+    plt.title("Ecosystem Size vs Engagement")
+    plt.xlabel("Number of Repositories")
+    plt.ylabel("Average Engagement Ratio")
+    plt.savefig(path)
+    plt.close()
+
+
+def scatter_job(path, df, x, y, hue=None, mode="auto", **spec):
+    # Scatter job over the rows of `df`, binned in aggregated render mode
+    data, density_spec = scatter_data(df, x, y, hue, mode)
+    return job(render_scatter, path, data, x=x, y=y, hue=hue, **spec, **density_spec)
+
+
+def figure_jobs(df, language_stats, mode="auto"):
+    jobs = []
+
+    # ==================================================
+    # 1. Average Stars per Language
+    # ==================================================
+    jobs.append(job(render_bar, f"{plots_dir}/01_language_popularity.png",
+                    language_stats["stargazers_count_mean"].sort_values(ascending=False),
+                    title="Average Stars per Language", ylabel="Average Stars", xlabel="Language"))
+
+    # ==================================================
+    # 2. Average Watchers per Language
+    # ==================================================
+    jobs.append(job(render_bar, f"{plots_dir}/02_watchers_comparison.png",
+                    language_stats["watchers_count_mean"].sort_values(ascending=False),
+                    title="Average Watchers per Language", ylabel="Average Watchers", xlabel="Language"))
+
+    # ==================================================
+    # 3. Engagement Ratio per Language
+    # ==================================================
+    jobs.append(job(render_bar, f"{plots_dir}/03_engagement_ratio.png",
+                    language_stats["engagement_ratio_mean"].sort_values(ascending=False),
+                    title="Average Engagement Ratio per Language", ylabel="Engagement Ratio",
+                    xlabel="Language"))
+
+    # ==================================================
+    # 4. Rust: Stars per Day vs Forks
+    # ==================================================
+    rust_df = df[df["language"] == "Rust"]
+
+    jobs.append(scatter_job(f"{plots_dir}/04_rust_focus.png", rust_df,
+                            x="stars_per_day", y="forks_count", mode=mode,
+                            title="Rust: Stars per Day vs Forks",
+                            xlabel="Stars per Day", ylabel="Forks"))
+
+    # ==================================================
+    # 5. PHP Maintenance Pressure
+    # ==================================================
+    php_df = df[df["language"] == "PHP"]
+
+    top_php = php_df.sort_values(
+        by="open_issues_count",
+        ascending=False
+    ).head(10)[["open_issues_count", "repo_name"]]
+
+    jobs.append(job(render_top_issues, f"{plots_dir}/05_php_maintenance.png", top_php,
+                    title="Top 10 PHP Repositories by Open Issues"))
+
+    # ==================================================
+    # 6. C & C++ Stability
+    # ==================================================
+    c_df = df.loc[df["language"].isin(["C", "C++"]), ["repo_age_days", "engagement_ratio", "language"]]
+    c_df["language"] = c_df["language"].cat.remove_unused_categories()
+
+    jobs.append(scatter_job(f"{plots_dir}/06_c_cpp_stability.png", c_df,
+                            x="repo_age_days", y="engagement_ratio", hue="language", mode=mode,
+                            title="C & C++: Repository Age vs Engagement",
+                            xlabel="Repository Age (Days)", ylabel="Engagement Ratio"))
+
+    # ==================================================
+    # 7. Popularity vs Maintenance (Log Scale)
+    # ==================================================
+    jobs.append(scatter_job(f"{plots_dir}/07_popularity_vs_issues.png", df,
+                            x="log_stars", y="open_issues_count", hue="language", mode=mode,
+                            title="Log(Stars) vs Open Issues", xlabel="Log(Stars)",
+                            ylabel="Open Issues"))
+
+    # ==================================================
+    # 8. Star Growth per Language
+    # ==================================================
+    jobs.append(job(render_bar, f"{plots_dir}/08_star_growth.png",
+                    language_stats["stars_per_day_mean"].sort_values(ascending=False),
+                    title="Average Stars per Day per Language", ylabel="Stars per Day",
+                    xlabel="Language"))
+
+    # ==================================================
+    # 9. Forks vs Stars (Log Scale)
+    # ==================================================
+    jobs.append(scatter_job(f"{plots_dir}/09_fork_behavior.png", df,
+                            x="log_stars", y="log_forks", hue="language", mode=mode,
+                            title="Log(Stars) vs Log(Forks)", xlabel="Log(Stars)",
+                            ylabel="Log(Forks)"))
+
+    # ==================================================
+    # 10. Ecosystem Size vs Engagement
+    # ==================================================
+    repo_count = language_stats["repo_count"].sort_values(ascending=False)
+    # Aligned on the same language order as repo_count
+    engagement_avg = language_stats["engagement_ratio_mean"].reindex(repo_count.index)
+
+    eco_df = pd.DataFrame({
+        "language": repo_count.index,
+        "repo_count": repo_count.values,
+        "engagement": engagement_avg.values
+    })
+
+    jobs.append(job(render_ecosystem, f"{plots_dir}/10_ecosystem_size_vs_quality.png", eco_df))
+
+    # ==================================================
+    # 11. Repository Age vs Popularity (Log Scale)
+    # ==================================================
+    jobs.append(scatter_job(f"{plots_dir}/11_age_vs_popularity.png", df,
+                            x="repo_age_years", y="log_stars", hue="language", mode=mode,
+                            title="Repository Age vs Log(Stars)",
+                            xlabel="Repository Age (Years)", ylabel="Log(Stars)"))
+
+    # ==================================================
+    # 12. Activity Load
+    # ==================================================
+    jobs.append(scatter_job(f"{plots_dir}/12_activity_load.png", df,
+                            x="days_since_last_update", y="open_issues_count", hue="language",
+                            mode=mode, title="Days Since Last Update vs Open Issues",
+                            xlabel="Days Since Last Update", ylabel="Open Issues"))
+
+    return jobs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the insight visualizations")
+    parser.add_argument("--workers", type=int, help="figures rendered in parallel (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-render figures that are up to date")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="auto",
+                        help="draw scatter plots point by point or from a density grid")
+    args = parser.parse_args()
+
+    os.makedirs(plots_dir, exist_ok=True)
+
+    # -------------------------
+    # Load Data
+    # -------------------------
+    # Only the columns used by the row-level plots are loaded
+    # (missing languages come back as "Unknown", types are narrowed)
+    df = load_dataset("../data/processed/featured_github_repos.csv", optimize=True, columns=[
+        "repo_name",
+        "language",
+        "forks_count",
+        "open_issues_count",
+        "repo_age_days",
+        "stars_per_day",
+        "log_stars",
+        "log_forks",
+        "repo_age_years",
+        "days_since_last_update",
+        "engagement_ratio"
+    ])
+
+    # Per-language averages come from the aggregate cube written by step 5
+    language_stats = by_language(load_cube())
+
+    jobs = figure_jobs(df, language_stats, args.render_mode)
+    rendered, skipped = render_all(jobs, workers=args.workers, force=args.force)
+
+    print(f"Insight visualizations: {rendered} rendered, {skipped} unchanged")
+    print(f"All {len(jobs)} final insight visualizations generated successfully!")
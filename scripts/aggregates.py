@@ -0,0 +1,88 @@
+import pandas as pd
+from storage import read_table, write_table
+
+# -------------------------------------------------------
+# Per-language aggregate cube shared by steps 6 and 7
+# Step 5 computes it in one grouped pass over the featured
+# dataset and saves it next to that dataset. The bar and line
+# charts read the cube instead of grouping the row-level data.
+# The cube holds counts and sums per (language, created_year),
+# so any coarser statistic (per language, per year, means) is
+# a cheap re-aggregation of a few hundred rows.
+# Missing values are left out of the sums and of the per-column
+# counts the means divide by, as in pandas' mean().
+# -------------------------------------------------------
+
+AGGREGATES_PATH = "../data/processed/language_aggregates.csv"
+
+# Columns summed per cell, with their non-null count per cell;
+# their means are sum / count
+SUM_COLUMNS = [
+    "stargazers_count",
+    "watchers_count",
+    "engagement_ratio",
+    "stars_per_day",
+    "days_since_last_update"
+]
+
+# Activity thresholds (days since last update)
+ACTIVE_DAYS = 180
+RECENT_DAYS = 90
+
+
+# ----------------------------------
+# 1. BUILD AND SAVE THE CUBE
+# ----------------------------------
+
+def build_cube(df):
+    # One grouped pass: repository count, sums, non-null counts and
+    # activity counts per (language, created_year)
+    days = df["days_since_last_update"]
+    cells = df[["language"] + SUM_COLUMNS].assign(
+        created_year=df["created_at"].dt.year,
+        active=(days <= ACTIVE_DAYS).astype("int64"),
+        recent=(days <= RECENT_DAYS).astype("int64")
+    )
+    cube = cells.groupby(["language", "created_year"], observed=True).agg(
+        repo_count=("active", "size"),
+        active_count=("active", "sum"),
+        recent_count=("recent", "sum"),
+        **{f"{col}_sum": (col, "sum") for col in SUM_COLUMNS},
+        **{f"{col}_count": (col, "count") for col in SUM_COLUMNS}
+    )
+    return cube.reset_index()
+
+
+def save_cube(df, path=AGGREGATES_PATH):
+    return write_table(build_cube(df), path)
+
+
+def load_cube(path=AGGREGATES_PATH):
+    cube = read_table(path)
+    cube["language"] = cube["language"].cat.remove_unused_categories()
+    return cube
+
+
+# ----------------------------------
+# 2. STATISTICS FOR THE FIGURES
+# ----------------------------------
+
+def by_language(cube):
+    # Per-language totals and means
+    totals = cube.drop(columns="created_year").groupby("language", observed=True).sum()
+    for col in SUM_COLUMNS:
+        # Languages without any value get NaN, not a division by zero
+        counts = totals[f"{col}_count"].where(totals[f"{col}_count"] > 0)
+        totals[f"{col}_mean"] = totals[f"{col}_sum"] / counts
+    return totals
+
+
+def repos_per_year(cube):
+    return cube.groupby("created_year")["repo_count"].sum().sort_index()
+
+
+def activity_counts(cube):
+    # Repositories updated within ACTIVE_DAYS ("Active") or not, largest first
+    active = int(cube["active_count"].sum())
+    counts = pd.Series({"Active": active, "Inactive": int(cube["repo_count"].sum()) - active})
+    return counts[counts > 0].sort_values(ascending=False)
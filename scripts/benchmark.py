@@ -0,0 +1,166 @@
+import argparse   #to read command line options
+import glob   #to copy the pipeline scripts
+import json   #to save results and baselines
+import os    #to build the benchmark tree
+import shutil   #to copy and remove the benchmark tree
+import subprocess   #to run each stage
+import sys    #to run stages with the same Python
+import tempfile   #to isolate benchmark runs from the real data
+import time   #to measure wall time
+from synthetic_data import generate
+
+# -------------------------------------------------------
+# Pipeline benchmark on synthetic data
+# For every requested scale, a copy of the scripts is run in a
+# temporary tree (scripts/, data/raw, data/processed, plots/)
+# on generated data, so the real data and caches are never
+# touched. Each stage runs in its own process; its wall time
+# and peak RSS (from os.wait4) are recorded.
+# Results are compared with a saved baseline, and stages that
+# got slower or bigger than the tolerance are reported as
+# regressions (exit code 1).
+# -------------------------------------------------------
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = "../data/benchmarks"
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+
+# Stages measured, in pipeline order
+STAGES = {
+    "02": "02_merge_csvs.py",
+    "03": "03_data_understanding.py",
+    "04": "04_data_cleaning.py",
+    "05": "05_feature_engineering.py",
+    "06": "06_eda_analysis.py",
+    "07": "07_insight_visualization.py"
+}
+
+# As-of date of the generated data and of the time-based features,
+# so runs on different days are comparable
+AS_OF = "2026-01-01"
+
+# Allowed slowdown / memory growth before a stage counts as a regression
+TOLERANCE = 0.25
+
+# Differences below these are noise and never reported
+MIN_WALL_DELTA = 0.5   # seconds
+MIN_RSS_DELTA = 20     # MB
+
+
+# ----------------------------------
+# 1. RUN ONE SCALE
+# ----------------------------------
+
+def build_tree(root):
+    # Copy of the scripts next to empty data folders
+    os.makedirs(os.path.join(root, "scripts"))
+    for path in glob.glob(os.path.join(SCRIPTS_DIR, "*.py")):
+        shutil.copy(path, os.path.join(root, "scripts"))
+    for folder in ("data/raw", "data/processed", "plots"):
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+
+def run_stage(script, cwd, env):
+    # Run one stage and return (wall seconds, peak RSS in MB)
+    # os.wait4 returns the resource usage of exactly this child (its peak
+    # RSS also covers the figure worker processes it waited for)
+    with open(os.path.join(cwd, f"{script}.log"), "w", encoding="utf-8") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, script], cwd=cwd, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"{script} failed, see {os.path.join(cwd, script)}.log")
+    # ru_maxrss is in kilobytes on Linux
+    return wall, usage.ru_maxrss / 1024
+
+
+def benchmark_scale(rows, stages, seed, keep=False):
+    root = tempfile.mkdtemp(prefix=f"github-eda-bench-{rows}-")
+    try:
+        build_tree(root)
+        scripts = os.path.join(root, "scripts")
+
+        start = time.perf_counter()
+        generate(rows, os.path.join(root, "data", "raw"), seed, as_of=AS_OF)
+        print(f"[{rows} rows] data generated in {time.perf_counter() - start:.1f}s")
+
+        # Headless plots, and the stages use the as-of date of the data
+        env = dict(os.environ, MPLBACKEND="Agg", GITHUB_EDA_AS_OF=AS_OF)
+
+        results = {}
+        for stage in stages:
+            wall, rss = run_stage(STAGES[stage], scripts, env)
+            results[stage] = {"wall_s": round(wall, 3), "peak_rss_mb": round(rss, 1)}
+            print(f"[{rows} rows] {stage}: {wall:8.2f}s  {rss:8.1f} MB")
+        return results
+    finally:
+        if keep:
+            print(f"Benchmark tree kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+# ----------------------------------
+# 2. COMPARE WITH THE BASELINE
+# ----------------------------------
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    # Stages slower or bigger than the baseline by more than `tolerance`
+    found = []
+    for rows, stages in results.items():
+        for stage, current in stages.items():
+            previous = baseline.get(rows, {}).get(stage)
+            if not previous:
+                continue
+            for metric, min_delta in (("wall_s", MIN_WALL_DELTA), ("peak_rss_mb", MIN_RSS_DELTA)):
+                delta = current[metric] - previous[metric]
+                if delta > min_delta and current[metric] > previous[metric] * (1 + tolerance):
+                    found.append(f"{rows} rows, stage {stage}: {metric} "
+                                 f"{previous[metric]} -> {current[metric]} (+{delta / previous[metric]:.0%})")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic data")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000],
+                        help="dataset sizes to benchmark")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES),
+                        help="stages to run (in pipeline order, later stages need earlier ones)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the generated data")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed relative growth of wall time and peak RSS")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary benchmark trees")
+    args = parser.parse_args()
+
+    os.chdir(SCRIPTS_DIR)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+
+    # JSON keys are strings, so the row counts are too
+    results = {str(rows): benchmark_scale(rows, args.stages, args.seed, args.keep) for rows in args.rows}
+
+    with open(os.path.join(RESULTS_DIR, "latest.json"), "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        raise SystemExit
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with (run with --save-baseline)")
+        raise SystemExit
+
+    with open(args.baseline, encoding="utf-8") as file:
+        found = regressions(results, json.load(file), args.tolerance)
+    if found:
+        print("Regressions against the baseline:")
+        for line in found:
+            print("  " + line)
+        raise SystemExit(1)
+    print("No regressions against the baseline")
@@ -0,0 +1,53 @@
+import csv     #to write rows in CSV format
+import os    #to flush, truncate and rename files
+
+
+class AtomicCsvWriter:
+    # Streams rows into `<path>.part` and only renames it to `path`
+    # once the file is complete, so readers never see a partial CSV
+    #
+    # Rows are written page by page: nothing is kept in memory between
+    # pages, and every page is flushed to disk before write_page returns
+
+    def __init__(self, path, header, resume_offset=None):
+        self.path = path
+        self.part_path = path + ".part"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        if resume_offset:
+            # Continue a partial file, dropping anything written after
+            # the last checkpointed page
+            # A missing file is an error: a new one would silently lose
+            # the checkpointed rows
+            if not os.path.exists(self.part_path) or os.path.getsize(self.part_path) < resume_offset:
+                raise FileNotFoundError(f"cannot resume {self.part_path}: missing or shorter than "
+                                        f"its checkpointed size ({resume_offset} bytes)")
+            self.file = open(self.part_path, "r+", newline="", encoding="utf-8")
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+            self.writer = csv.writer(self.file)
+        else:
+            self.file = open(self.part_path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(header)
+            self.sync()
+
+    def sync(self):
+        # Push buffered rows to disk and return the durable file size
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def write_page(self, rows):
+        self.writer.writerows(rows)
+        return self.sync()
+
+    def commit(self):
+        # Close the file and atomically move it into place
+        self.file.close()
+        os.replace(self.part_path, self.path)
+
+    def close(self):
+        # Close without publishing, the .part file stays for a later resume
+        if not self.file.closed:
+            self.file.close()
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from storage import CATEGORY_COLUMNS, COUNT_COLUMNS, FLOAT_COLUMNS
+from tracing import span
+
+# -------------------------------------------------------
+# Memory-compact dtypes for the in-memory analysis
+# The stage files keep the wide schema of storage.py; frames
+# that are only analysed (steps 3, 6 and 7) are narrowed after
+# loading:
+# - language columns become categoricals
+# - counts get the narrowest integer type holding their range
+# - derived ratios and log features become float32
+# Arithmetic on narrowed columns can overflow or lose digits,
+# so stages that compute and write new values (4 and 5) keep
+# the wide types.
+# -------------------------------------------------------
+
+# Unsigned types first, counts are never negative
+INTEGER_TYPES = ["uint8", "uint16", "uint32", "int8", "int16", "int32", "int64"]
+
+# Derived columns where float32 (about 7 significant digits) is enough:
+# they are rounded to 3 decimals or only plotted
+FLOAT32_COLUMNS = FLOAT_COLUMNS
+
+
+def smallest_integer_type(series):
+    # Narrowest integer type holding every value of `series`
+    values = series.dropna()
+    if values.empty:
+        return INTEGER_TYPES[0]
+    return integer_type(int(values.min()), int(values.max()))
+
+
+def integer_type(low, high):
+    # Narrowest integer type holding the range [low, high]
+    for dtype in INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return "int64"
+
+
+def _nullable(dtype):
+    # Nullable extension type of a numpy integer type ("uint16" -> "UInt16")
+    return dtype[0].upper() + dtype[1:] if dtype[0] == "i" else "U" + dtype[1:].capitalize()
+
+
+def optimize_dtypes(df, report=False, label="dataset"):
+    # Narrow the column types of `df` in place and return it
+    before = df.memory_usage(deep=True) if report else None
+
+    with span("optimize_dtypes", rows_in=len(df)):
+        for col in CATEGORY_COLUMNS:
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+
+        for col in COUNT_COLUMNS:
+            if col in df.columns and pd.api.types.is_integer_dtype(df[col].dtype):
+                dtype = smallest_integer_type(df[col])
+                # Counts with missing values stay nullable
+                df[col] = df[col].astype(_nullable(dtype) if df[col].isna().any() else dtype)
+
+        for col in FLOAT32_COLUMNS:
+            if col in df.columns and df[col].dtype == "float64":
+                # Values beyond the float32 range would turn into inf
+                if df[col].abs().max() < np.finfo("float32").max:
+                    df[col] = df[col].astype("float32")
+
+    if report:
+        print_memory_report(before, df.memory_usage(deep=True), label)
+    return df
+
+
+def print_memory_report(before, after, label="dataset"):
+    # Per-column memory before and after optimize_dtypes
+    # `before` and `after` are results of DataFrame.memory_usage(deep=True)
+    print(f"Memory usage ({label}):")
+    print(f"  {'column':<26}{'before MB':>12}{'after MB':>12}")
+    for col in after.index:
+        if col == "Index":
+            continue
+        print(f"  {col:<26}{before[col] / 1e6:>12.2f}{after[col] / 1e6:>12.2f}")
+    total_before, total_after = before.sum(), after.sum()
+    ratio = total_before / total_after if total_after else 1.0
+    print(f"  {'total':<26}{total_before / 1e6:>12.2f}{total_after / 1e6:>12.2f}  ({ratio:.1f}x smaller)")
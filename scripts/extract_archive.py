@@ -0,0 +1,69 @@
+import argparse   #to read command line options
+import os    #to build output paths
+from csv_stream import AtomicCsvWriter   #to write CSV files atomically
+from raw_archive import ARCHIVE_DIR, REPO_FIELDS, find_archives, iter_repos, project
+
+# -------------------------------------------------------
+# Rebuild per-language CSV files from the raw API archive
+# written by 01_collect_github_data.py, without any network.
+#
+# By default the same columns as the collector are produced.
+# New projections can be derived in seconds, for example:
+#
+#   python extract_archive.py --fields repo_name=name,full_name,topics,license=license.spdx_id
+# -------------------------------------------------------
+
+# ----------------------------------
+# 1. COMMAND LINE OPTIONS
+# ----------------------------------
+
+parser = argparse.ArgumentParser(description="Extract CSV files from the raw API archive")
+parser.add_argument("--archive-dir", default=ARCHIVE_DIR,
+                    help="folder containing <language>.jsonl.gz/.zst archives")
+parser.add_argument("--output-dir", default="../data/raw",
+                    help="folder for the <language>_repos.csv files")
+parser.add_argument("--fields",
+                    help="comma separated columns, either 'field' or 'column=field' "
+                         "(dots reach into nested objects); defaults to the collector columns")
+parser.add_argument("--languages", help="comma separated languages, defaults to all archives")
+args = parser.parse_args()
+
+# Parse the requested projection
+if args.fields:
+    fields = []
+    for spec in args.fields.split(","):
+        column, _, field = spec.partition("=")
+        fields.append((column, field or column))
+else:
+    fields = REPO_FIELDS
+
+# ----------------------------------
+# 2. STREAM ARCHIVES INTO CSV FILES
+# ----------------------------------
+
+archives = find_archives(args.archive_dir)
+if args.languages:
+    archives = {lang: archives[lang] for lang in args.languages.split(",") if lang in archives}
+
+if not archives:
+    print(f"No archives found in {args.archive_dir}")
+
+for language, path in archives.items():
+    file_path = os.path.join(args.output_dir, f"{language}_repos.csv")
+    writer = AtomicCsvWriter(file_path, [column for column, _ in fields])
+
+    # Rows are written in batches of 1000, so memory only grows with
+    # the ids iter_repos keeps to skip repeated repositories
+    batch = []
+    count = 0
+    for repo in iter_repos(path):
+        batch.append(project(repo, fields))
+        if len(batch) == 1000:
+            writer.write_page(batch)
+            count += len(batch)
+            batch = []
+    writer.write_page(batch)
+    count += len(batch)
+    writer.commit()
+
+    print(f"Extracted {count} repositories from {path} to {file_path}")
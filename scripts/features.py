@@ -0,0 +1,208 @@
+import os    #to read the pinned as-of date
+import numpy as np
+import pandas as pd
+from tracing import span
+
+# -------------------------------------------------------
+# Feature registry for steps 4 and 5
+# Each feature declares the columns it needs and a vectorized
+# function computing it. Consumers ask for the features they
+# use; their dependencies are resolved and computed once, and
+# every time-based feature uses the same as-of timestamp.
+# -------------------------------------------------------
+
+# Registered features:
+# name -> {"inputs": [...], "func": f(df, as_of), "time_based": bool}
+FEATURES = {}
+
+
+def feature(name, inputs, time_based=False):
+    # Decorator registering a feature computed from `inputs`
+    # `time_based` marks features that change with the as-of time
+    def register(func):
+        FEATURES[name] = {"inputs": list(inputs), "func": func, "time_based": time_based}
+        return func
+    return register
+
+
+def pinned_as_of():
+    # Reference time of the time-based features
+    # GITHUB_EDA_AS_OF (a date or timestamp, set by run_pipeline.py) pins
+    # it so reruns on the same input give the same output
+    value = os.getenv("GITHUB_EDA_AS_OF")
+    if value:
+        return utc_timestamp(value)
+    return pd.Timestamp.now(tz="UTC")
+
+
+def utc_timestamp(value):
+    # UTC Timestamp of a date, timestamp string or Timestamp
+    # (values without a time zone are taken as UTC)
+    value = pd.Timestamp(value)
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+
+# ----------------------------------
+# 1. TIME-BASED FEATURES
+# ----------------------------------
+
+@feature("repo_age_days", ["created_at"], time_based=True)
+def repo_age_days(df, as_of):
+    # Repository age in days
+    return (as_of - df["created_at"]).dt.days
+
+
+@feature("repo_age_years", ["created_at"], time_based=True)
+def repo_age_years(df, as_of):
+    # Shows how old the repository is
+    return ((as_of - df["created_at"]).dt.days / 365).round(2)
+
+
+@feature("days_since_last_update", ["updated_at"], time_based=True)
+def days_since_last_update(df, as_of):
+    # Indicates how recently the repository was active
+    return (as_of - df["updated_at"]).dt.days
+
+
+@feature("stars_per_day", ["stargazers_count", "repo_age_days"])
+def stars_per_day(df, as_of):
+    # Average stars gained per day, measures popularity growth
+    return df["stargazers_count"] / df["repo_age_days"]
+
+
+# ----------------------------------
+# 2. POPULARITY FEATURES
+# ----------------------------------
+# GitHub popularity metrics are highly right-skewed.
+# Log transformation stabilizes variance and improves analysis.
+
+@feature("log_stars", ["stargazers_count"])
+def log_stars(df, as_of):
+    return np.log1p(df["stargazers_count"])
+
+
+@feature("log_forks", ["forks_count"])
+def log_forks(df, as_of):
+    return np.log1p(df["forks_count"])
+
+
+@feature("log_watchers", ["watchers_count"])
+def log_watchers(df, as_of):
+    return np.log1p(df["watchers_count"])
+
+
+@feature("popularity_score", ["log_stars", "log_forks", "log_watchers"])
+def popularity_score(df, as_of):
+    # Combined popularity using log-transformed metrics
+    # Prevents extreme repositories from dominating analysis
+    return (df["log_stars"] + df["log_forks"] + df["log_watchers"]).round(3)
+
+
+@feature("engagement_ratio", ["forks_count", "stargazers_count"])
+def engagement_ratio(df, as_of):
+    # Forks relative to popularity, +1 avoids division-by-zero errors
+    return (df["forks_count"] / (df["stargazers_count"] + 1)).round(3)
+
+
+# ----------------------------------
+# 3. DEPENDENCY RESOLUTION
+# ----------------------------------
+
+def resolve(names, available=()):
+    # Features to compute for `names`, dependencies first
+    # Requested features are always computed; dependencies only when
+    # they are not already among the `available` columns
+    order = []
+
+    def visit(name, requested, path):
+        if name in order or (not requested and name in available):
+            return
+        if name not in FEATURES:
+            if name in available:
+                return
+            raise KeyError(f"unknown feature or missing column: {name}")
+        if name in path:
+            raise ValueError(f"circular feature dependency: {' -> '.join(path + [name])}")
+        for dependency in FEATURES[name]["inputs"]:
+            visit(dependency, False, path + [name])
+        order.append(name)
+
+    for name in names:
+        visit(name, True, [])
+    return order
+
+
+def add_features(df, names, as_of=None):
+    # Add the requested features (and missing dependencies) to `df`
+    # Returns the names of the features that were computed
+    as_of = pinned_as_of() if as_of is None else as_of
+    order = resolve(names, available=set(df.columns))
+    for name in order:
+        with span(f"feature:{name}", rows_in=len(df), rows_out=len(df)):
+            df[name] = FEATURES[name]["func"](df, as_of)
+    return order
+
+
+def is_time_based(name):
+    # True when the feature or any feature it depends on uses the as-of time
+    if name not in FEATURES:
+        return False
+    return FEATURES[name]["time_based"] or any(is_time_based(dep) for dep in FEATURES[name]["inputs"])
+
+
+# ----------------------------------
+# 4. INCREMENTAL UPDATES
+# ----------------------------------
+
+def key_index(df, key_columns):
+    # Index of the repository keys of `df`, always a MultiIndex (also
+    # for the single repo_id key) so both sides of a lookup match
+    return pd.MultiIndex.from_frame(df[key_columns])
+
+
+def latest(previous, columns, key_columns):
+    # `columns` of the last row of each repository in `previous`,
+    # indexed by key_index
+    known = previous.drop_duplicates(key_columns, keep="last")
+    return known[columns].set_axis(key_index(known, key_columns))
+
+
+def changed_rows(df, previous, key_columns, version_column="updated_at"):
+    # Boolean mask of the rows of `df` that are new or whose version
+    # column differs from the same repository in `previous`
+    known = latest(previous, version_column, key_columns)
+    old_version = known.reindex(key_index(df, key_columns))
+    # New repositories have no old version (NaT), which never compares equal
+    return pd.Series(old_version.to_numpy() != df[version_column].to_numpy(), index=df.index)
+
+
+def update_features(df, previous, names, key_columns, as_of=None):
+    # add_features for data that was featured before
+    # Features of unchanged rows are copied from `previous`; they are only
+    # computed for new or changed rows. Time-based features are computed
+    # for every row, since they move with the as-of time
+    # Returns the number of new or changed rows
+    as_of = pinned_as_of() if as_of is None else as_of
+    names = resolve(names, available=set(df.columns))
+    stored = [name for name in names if not is_time_based(name) and name in previous.columns]
+    changed = changed_rows(df, previous, key_columns)
+
+    # Placeholders keep the column order of a full run
+    for name in names:
+        if name not in df.columns:
+            df[name] = np.nan
+
+    # Unchanged rows: copy the stored features, matched on the key
+    copied = latest(previous, stored, key_columns).reindex(key_index(df, key_columns))
+    for name in stored:
+        df[name] = copied[name].to_numpy()
+
+    # New or changed rows: compute the stored features
+    if changed.any():
+        subset = df.loc[changed].copy()
+        add_features(subset, stored, as_of)
+        df.loc[changed, stored] = subset[stored]
+
+    # Everything that depends on the as-of time, for all rows
+    add_features(df, [name for name in names if name not in stored], as_of)
+    return int(changed.sum())
@@ -0,0 +1,215 @@
+import hashlib   #to fingerprint figure jobs
+import inspect   #to include the render code in the fingerprint
+import json   #to store figure fingerprints
+import os    #to work with output paths
+import sys    #to include this module's drawing helpers in the fingerprint
+from concurrent.futures import ProcessPoolExecutor   #to render figures in parallel
+import time   #to time figures rendered in worker processes
+import matplotlib
+matplotlib.use("Agg")   #non-interactive backend, figures are only saved
+import numpy as np
+import pandas as pd
+from tracing import add_span, file_size
+
+# -------------------------------------------------------
+# Figure jobs for steps 6 and 7
+# Each figure is an independent job: a module-level render
+# function, the data it plots and a spec (titles, labels,
+# dpi, ...). Jobs render in a process pool and a figure is
+# only re-rendered when its data, spec, render code, the
+# drawing helpers below or the plot style changed since the
+# file was last written.
+#
+# Render functions are called as render(data, spec, path) and
+# must save the figure to `path` and close it.
+# -------------------------------------------------------
+
+# Fingerprint of every rendered figure, one small file per figure
+FIGURE_CACHE_DIR = "../data/cache/figures"
+
+# Scatter plots of at least this many rows are drawn from a density
+# grid in "auto" render mode (see section 3)
+RENDER_MODES = ["auto", "points", "density"]
+DENSITY_MIN_ROWS = 100_000
+DENSITY_BINS = 100
+
+# Part of every fingerprint: bump it to re-render all figures after a
+# change the fingerprint cannot see (e.g. in a module a render
+# function imports)
+RENDER_VERSION = 1
+
+
+def job(render, path, data, **spec):
+    return {"render": render, "path": path, "data": data, "spec": spec}
+
+
+# ----------------------------------
+# 1. FINGERPRINTS
+# ----------------------------------
+
+def _update(digest, data):
+    # Hash of a DataFrame/Series, or a dict of them, values and dtypes
+    if isinstance(data, dict):
+        for key in sorted(data):
+            digest.update(f"key:{key}\n".encode())
+            _update(digest, data[key])
+    elif isinstance(data, (pd.DataFrame, pd.Series)):
+        frame = data.to_frame() if isinstance(data, pd.Series) else data
+        digest.update(f"{list(frame.columns)}:{list(map(str, frame.dtypes))}\n".encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    else:
+        digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+
+
+def fingerprint(figure):
+    import seaborn as sns
+
+    digest = hashlib.sha256()
+    digest.update(f"render:{RENDER_VERSION} matplotlib:{matplotlib.__version__} "
+                  f"seaborn:{sns.__version__}\n".encode())
+    digest.update(inspect.getsource(figure["render"]).encode())
+    # Drawing helpers of this module (draw_scatter, scatter_data, ...)
+    digest.update(inspect.getsource(sys.modules[__name__]).encode())
+    # Style in effect (the seaborn theme set by steps 6 and 7), the
+    # workers inherit it
+    digest.update(json.dumps(sorted(matplotlib.rcParams.items()), default=str).encode())
+    digest.update(json.dumps(figure["spec"], sort_keys=True, default=str).encode())
+    _update(digest, figure["data"])
+    return digest.hexdigest()
+
+
+def _stamp_path(path):
+    return os.path.join(FIGURE_CACHE_DIR, os.path.basename(path) + ".json")
+
+
+def is_current(path, key):
+    # True when `path` was rendered from the same job and not replaced since
+    try:
+        with open(_stamp_path(path), encoding="utf-8") as file:
+            stamp = json.load(file)
+        return stamp["fingerprint"] == key and stamp["mtime_ns"] == os.stat(path).st_mtime_ns
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def _stamp(path, key):
+    os.makedirs(FIGURE_CACHE_DIR, exist_ok=True)
+    with open(_stamp_path(path), "w", encoding="utf-8") as file:
+        json.dump({"path": path, "fingerprint": key, "mtime_ns": os.stat(path).st_mtime_ns}, file)
+
+
+# ----------------------------------
+# 2. RUN JOBS
+# ----------------------------------
+
+def _render(figure):
+    # Runs in a worker process, returns the path and its timings
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    figure["render"](figure["data"], figure["spec"], figure["path"])
+    return figure["path"], time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+
+def render_all(jobs, workers=None, force=False):
+    # Render the jobs whose figure is missing or out of date
+    # Returns (rendered, skipped) counts
+    pending = []
+    for figure in jobs:
+        key = fingerprint(figure)
+        if force or not is_current(figure["path"], key):
+            pending.append((figure, key))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), len(pending))) as pool:
+            for (figure, key), (path, wall, cpu) in zip(pending, pool.map(_render, [figure for figure, _ in pending])):
+                _stamp(path, key)
+                rows = len(figure["data"]) if not isinstance(figure["data"], dict) else None
+                add_span(f"figure:{os.path.basename(path)}", wall_s=round(wall, 6), cpu_s=round(cpu, 6),
+                         rows_in=rows, bytes_written=file_size(path))
+
+    return len(pending), len(jobs) - len(pending)
+
+
+# ----------------------------------
+# 3. AGGREGATED (DENSITY) RENDERING
+# ----------------------------------
+# Large scatter plots are binned into a bins x bins grid (per hue
+# group) before they are handed to a job. The job then draws one
+# marker per non-empty cell, sized by its count, or a 2-D histogram
+# when there is no hue. Render time, job data and image size depend
+# on the grid resolution instead of the number of rows.
+
+def use_density(mode, rows):
+    # Whether a scatter plot of `rows` points is drawn from a density grid
+    return mode == "density" or (mode == "auto" and rows >= DENSITY_MIN_ROWS)
+
+
+def _cell(values, low, high, bins):
+    # Bin index of each value, the upper edge falls in the last bin
+    width = (high - low) or 1.0
+    return np.clip(((values - low) / width * bins).astype("int64"), 0, bins - 1)
+
+
+def _extent(values):
+    # [min, max] of `values`, widened around a single value so the
+    # cells and the hist2d range have a non-zero width
+    low, high = float(values.min()), float(values.max())
+    if low == high:
+        pad = abs(low) * 0.05 or 0.5
+        low, high = low - pad, high + pad
+    return [low, high]
+
+
+def density_grid(df, x, y, hue=None, bins=DENSITY_BINS):
+    # Counts per (hue, x cell, y cell) with the cell centers in the `x`
+    # and `y` columns, plus the plotted range [[xmin, xmax], [ymin, ymax]]
+    # `df` needs at least one row with both values (see scatter_data)
+    points = df[[x, y] + ([hue] if hue else [])].dropna()
+    xs = points[x].to_numpy(dtype="float64")
+    ys = points[y].to_numpy(dtype="float64")
+    extent = [_extent(xs), _extent(ys)]
+
+    cells = pd.DataFrame({
+        "x_cell": _cell(xs, *extent[0], bins),
+        "y_cell": _cell(ys, *extent[1], bins)
+    })
+    keys = ["x_cell", "y_cell"]
+    if hue:
+        cells[hue] = points[hue].to_numpy()
+        keys = [hue] + keys
+    grid = cells.groupby(keys, observed=True).size().rename("count").reset_index()
+
+    # Cell centers in data units
+    x_width = (extent[0][1] - extent[0][0]) / bins
+    y_width = (extent[1][1] - extent[1][0]) / bins
+    grid[x] = extent[0][0] + (grid["x_cell"] + 0.5) * x_width
+    grid[y] = extent[1][0] + (grid["y_cell"] + 0.5) * y_width
+    return grid.drop(columns=["x_cell", "y_cell"]), extent
+
+
+def scatter_data(df, x, y, hue=None, mode="auto", bins=DENSITY_BINS):
+    # Job data and spec entries of a scatter plot: the rows themselves,
+    # or their density grid in aggregated mode
+    # Selections without any complete point are drawn as (empty) points
+    columns = [x, y] + ([hue] if hue else [])
+    if not use_density(mode, len(df)) or df[columns].dropna().empty:
+        return df[columns], {}
+    grid, extent = density_grid(df, x, y, hue, bins)
+    return grid, {"density": True, "bins": bins, "extent": extent}
+
+
+def draw_scatter(ax, data, spec, x, y, hue=None, **kwargs):
+    # Draw the rows or the density grid of scatter_data on `ax`
+    import seaborn as sns
+    from matplotlib.colors import LogNorm
+
+    if not spec.get("density"):
+        sns.scatterplot(data=data, x=x, y=y, hue=hue, ax=ax, **kwargs)
+    elif hue:
+        # One marker per non-empty cell and group, area grows with the count
+        sns.scatterplot(data=data, x=x, y=y, hue=hue, size="count", sizes=(5, 200),
+                        alpha=0.6, linewidth=0, ax=ax)
+    else:
+        # 2-D histogram rebuilt from the cell centers
+        ax.hist2d(data[x], data[y], bins=spec["bins"], range=spec["extent"],
+                  weights=data["count"], norm=LogNorm(), cmap="viridis")
@@ -0,0 +1,373 @@
+import hashlib   #to build cache keys
+import json   #to store cached responses
+import os    #to read environment variables
+import random   #to add jitter to retry delays
+import threading   #to share rate-limit state between worker threads
+import time   #to pause when the rate limit is exhausted
+import requests     #to send request to GitHub API
+from requests.adapters import HTTPAdapter   #to size the connection pool
+from tracing import event   #to record request latency and waits
+
+# ----------------------------------
+# 1. CLIENT CONFIGURATION
+# ----------------------------------
+
+# Base URL of the GitHub REST API
+# Can be pointed at a local stub server for offline testing
+API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+
+# How many times a single request is retried after a rate-limit
+# or server error before giving up
+MAX_RETRIES = 5
+
+# Base and cap (seconds) of the jittered exponential backoff used for
+# server and network errors
+BACKOFF_BASE = 1
+BACKOFF_CAP = 60
+
+# Wait used for a secondary rate limit that does not send Retry-After
+# GitHub asks clients to wait at least one minute in that case
+SECONDARY_LIMIT_WAIT = 60
+
+# Seconds to wait for the server before a request counts as failed
+REQUEST_TIMEOUT = 30
+
+# Folder for cached responses (ETag + body), keyed by API path and parameters
+CACHE_DIR = "../data/cache/http"
+
+
+class GitHubError(Exception):
+    # Raised when a request keeps failing after all retries
+    pass
+
+
+def read_tokens():
+    # Tokens from GITHUB_TOKENS (comma separated), falling back to GITHUB_TOKEN
+    tokens = [token.strip() for token in os.getenv("GITHUB_TOKENS", "").split(",") if token.strip()]
+    return tokens or [os.getenv("GITHUB_TOKEN")]
+
+
+# ----------------------------------
+# 2. RATE LIMITS AND TOKEN POOL
+# ----------------------------------
+
+def rate_limit_resource(path):
+    # Quota a request counts against (GitHub's X-RateLimit-Resource)
+    # Search has its own small per-minute bucket and GraphQL its own
+    # points budget, separate from the core REST quota of the token
+    path = "/" + path.lstrip("/")
+    if path == "/graphql":
+        return "graphql"
+    if path.startswith("/search/code"):
+        return "code_search"
+    if path.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+class RateLimiter:
+    # Quotas of one token, one window per resource (core, search,
+    # graphql, ...), driven by the X-RateLimit-* and Retry-After
+    # response headers instead of a fixed sleep between requests
+
+    def __init__(self, token, lock):
+        self.token = token
+        self.lock = lock           # shared with the token pool
+        self.windows = {}          # resource -> {"remaining", "reset_at"}
+        self.blocked_until = 0.0   # set by Retry-After / secondary limits
+
+    def window(self, resource):
+        # Requests left and reset time (epoch second) of one resource
+        return self.windows.setdefault(resource, {"remaining": None, "reset_at": 0.0})
+
+    def available_at(self, now, resource="core", cost=1):
+        # Earliest time this token may send a request costing `cost`
+        # units of `resource`
+        if now < self.blocked_until:
+            return self.blocked_until
+        window = self.window(resource)
+        if window["remaining"] is not None and window["remaining"] < cost and now < window["reset_at"]:
+            return window["reset_at"]
+        return now
+
+    def quota(self, resource="core"):
+        # Unknown quota (no response seen yet) is tried first
+        remaining = self.window(resource)["remaining"]
+        return float("inf") if remaining is None else remaining
+
+    def reserve(self, resource="core", cost=1):
+        # Count a request that is about to be sent (called under the lock)
+        window = self.window(resource)
+        if window["remaining"] is not None:
+            window["remaining"] -= cost
+
+    def update(self, response, resource="core"):
+        # Record the quota reported by the server for the current window
+        # of the resource the server counted the request against
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        remaining, reset = int(remaining), float(reset)
+        resource = response.headers.get("X-RateLimit-Resource", resource)
+        with self.lock:
+            window = self.window(resource)
+            if reset != window["reset_at"]:
+                # A new window started: trust the server value
+                window["reset_at"] = reset
+                window["remaining"] = remaining
+            else:
+                # Responses can arrive out of order, keep the lowest count
+                window["remaining"] = min(self.quota(resource), remaining)
+
+    def block(self, seconds):
+        # Pause this token for the given number of seconds
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+
+
+class TokenPool:
+    # Hands out the token with the most remaining quota for a resource
+    # With N tokens, N times the requests fit into one rate-limit window
+    # REST requests cost one unit; a GraphQL query costs the points the
+    # server reported for the last query (rateLimit.cost)
+
+    def __init__(self, tokens):
+        self.lock = threading.Lock()
+        self.limiters = [RateLimiter(token, self.lock) for token in tokens or [None]]
+        self.costs = {}   # resource -> units of one request, when not 1
+
+    def record_cost(self, resource, cost):
+        with self.lock:
+            self.costs[resource] = max(int(cost), 1)
+
+    def acquire(self, resource="core"):
+        # Block until some token may be used, then reserve one unit of it
+        # Reserving up front stops concurrent workers from overshooting
+        while True:
+            with self.lock:
+                now = time.time()
+                cost = self.costs.get(resource, 1)
+                ready = [limiter for limiter in self.limiters if limiter.available_at(now, resource, cost) <= now]
+                if ready:
+                    limiter = max(ready, key=lambda limiter: limiter.quota(resource))
+                    limiter.reserve(resource, cost)
+                    return limiter
+                delay = min(limiter.available_at(now, resource, cost) for limiter in self.limiters) - now
+            event("rate_limit_wait", seconds=round(delay, 3), resource=resource)
+            time.sleep(delay)
+
+
+# ----------------------------------
+# 3. RESPONSE CACHE
+# ----------------------------------
+
+class ResponseCache:
+    # On-disk cache of successful responses and their ETags
+    # Revalidated entries come back as 304, which GitHub does not count
+    # against the rate limit
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, endpoint, params):
+        # The key leaves out the base URL so a cache filled against one
+        # server can be replayed against another (or none at all)
+        key = json.dumps([endpoint, sorted((params or {}).items())], default=str)
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def load(self, endpoint, params):
+        try:
+            with open(self.path(endpoint, params), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def store(self, endpoint, params, etag, body):
+        # Written through a temporary file so parallel workers and
+        # crashes never leave a half-written entry
+        path = self.path(endpoint, params)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"endpoint": endpoint, "params": params, "etag": etag, "body": body}, file)
+        os.replace(tmp_path, path)
+
+
+# ----------------------------------
+# 4. GITHUB CLIENT
+# ----------------------------------
+
+class GitHubClient:
+    # Reusable GitHub REST client shared by all worker threads
+    # - one pooled keep-alive Session (gzip is negotiated by requests)
+    # - retries with jittered exponential backoff
+    # - a pool of tokens, each request uses the one with most quota left
+    # With a cache, known responses are revalidated with If-None-Match
+    # In replay mode every request is served from the cache and the
+    # network is never used
+
+    def __init__(self, tokens=None, base_url=API_URL, max_retries=MAX_RETRIES,
+                 secondary_wait=SECONDARY_LIMIT_WAIT, cache=None, replay=False,
+                 pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.secondary_wait = secondary_wait
+        self.tokens = TokenPool(tokens)
+        self.cache = cache
+        self.replay = replay
+        if replay and cache is None:
+            raise ValueError("replay mode needs a response cache")
+
+        # Keep-alive connections are reused across requests and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "Accept-Encoding": "gzip"
+        })
+
+    def _backoff(self, attempt):
+        # "Full jitter": spreads retries of parallel workers apart
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def _is_rate_limited(self, response):
+        # 429 always, 403 only when the server says it is a rate limit;
+        # other 403s (bad token, missing permission) are final
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        return (response.headers.get("Retry-After") is not None
+                or response.headers.get("X-RateLimit-Remaining") == "0"
+                or "secondary rate limit" in response.text.lower())
+
+    def _retry_delay(self, response, attempt, limiter):
+        # Work out how long to wait before retrying a rejected request
+        # Returns None when the response should not be retried (every
+        # 2xx, 304 and 4xx other than a rate limit)
+        retry_after = response.headers.get("Retry-After")
+
+        if self._is_rate_limited(response):
+            if retry_after is not None:
+                delay = float(retry_after)
+                limiter.block(delay)
+                return delay
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                # Primary limit: this token is spent until its reset, the
+                # pool moves on to another token or waits for the reset
+                return 0
+            # Secondary limit without Retry-After
+            delay = self.secondary_wait * 2 ** attempt + self._backoff(attempt)
+            limiter.block(delay)
+            return delay
+
+        if response.status_code >= 500:
+            # Server errors honour Retry-After (e.g. 503) or back off
+            delay = float(retry_after) if retry_after is not None else self._backoff(attempt)
+            event("retry_backoff", seconds=round(delay, 3), status=response.status_code)
+            time.sleep(delay)
+            return delay
+
+        return None
+
+    def request(self, path, params=None, headers=None, method="GET", json_body=None):
+        # Send a request with retries and return the final response
+        # Every status that is not retried (2xx, 304, 404, ...) is returned
+        url = self.base_url + "/" + path.lstrip("/")
+        resource = rate_limit_resource(path)
+
+        for attempt in range(self.max_retries + 1):
+            limiter = self.tokens.acquire(resource)
+            request_headers = dict(headers or {})
+            if limiter.token:
+                request_headers["Authorization"] = f"Bearer {limiter.token}"
+
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=request_headers, params=params,
+                                                json=json_body, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as error:
+                event("http_request", path=path, latency_s=round(time.perf_counter() - start, 6),
+                      status=None, attempt=attempt)
+                # Network failures are retried like server errors
+                if attempt == self.max_retries:
+                    raise GitHubError(f"{url}: {error}") from error
+                time.sleep(self._backoff(attempt))
+                continue
+            event("http_request", path=path, latency_s=round(time.perf_counter() - start, 6),
+                  status=response.status_code, attempt=attempt,
+                  bytes_read=len(response.content))
+            limiter.update(response, resource)
+
+            delay = self._retry_delay(response, attempt, limiter)
+            if delay is None:
+                return response
+            if attempt == self.max_retries:
+                break
+            if delay:
+                print(f"  Rate limited ({response.status_code}), retrying in {delay:.0f}s")
+
+        raise GitHubError(f"{response.status_code} for {url}: {response.text[:200]}")
+
+    def get(self, path, params=None):
+        # Send a GET request and return the decoded JSON body
+        endpoint = "/" + path.lstrip("/")
+
+        cached = self.cache.load(endpoint, params) if self.cache else None
+        if self.replay:
+            if cached is None:
+                raise GitHubError(f"not in cache (replay mode): {endpoint} {params}")
+            return cached["body"]
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+
+        response = self.request(endpoint, params, headers)
+
+        if response.status_code == 304:
+            # Unchanged since the cached copy
+            return cached["body"]
+
+        if response.status_code == 200:
+            body = response.json()
+            if self.cache:
+                self.cache.store(endpoint, params, response.headers.get("ETag"), body)
+            return body
+
+        raise GitHubError(f"{response.status_code} for {endpoint}: {response.text[:200]}")
+
+    def graphql(self, query, variables=None):
+        # Run a GraphQL query and return its "data" object
+        # Responses are cached and replayed like REST responses, keyed by
+        # the query text and variables
+        key = {"query": query, "variables": json.dumps(variables or {}, sort_keys=True)}
+
+        if self.replay:
+            cached = self.cache.load("/graphql", key)
+            if cached is None:
+                raise GitHubError(f"not in cache (replay mode): /graphql {variables}")
+            return cached["body"]
+
+        response = self.request("/graphql", method="POST",
+                                json_body={"query": query, "variables": variables or {}})
+        if response.status_code != 200:
+            raise GitHubError(f"{response.status_code} for /graphql: {response.text[:200]}")
+
+        body = response.json()
+        if body.get("errors") and not body.get("data"):
+            raise GitHubError(f"GraphQL errors: {body['errors']}")
+
+        # Queries that select rateLimit report their point cost, later
+        # queries reserve that many points of the token's GraphQL quota
+        rate_limit = (body.get("data") or {}).get("rateLimit")
+        if rate_limit:
+            self.tokens.record_cost("graphql", rate_limit["cost"])
+            event("graphql_cost", cost=rate_limit["cost"], remaining=rate_limit.get("remaining"))
+
+        if self.cache:
+            self.cache.store("/graphql", key, None, body["data"])
+        return body["data"]
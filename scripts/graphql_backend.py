@@ -0,0 +1,97 @@
+# ----------------------------------
+# 1. GRAPHQL SEARCH QUERY
+# ----------------------------------
+
+# One paginated query returns repositories together with the nested
+# fields that the REST search would need extra requests for
+# 100 nodes per page is the GraphQL maximum
+# rateLimit reports the point cost of the query, which the client
+# reserves from the token's GraphQL quota before the next page
+SEARCH_QUERY = """
+query($query: String!, $first: Int!, $after: String) {
+  rateLimit { cost remaining resetAt }
+  search(query: $query, type: REPOSITORY, first: $first, after: $after) {
+    repositoryCount
+    pageInfo { hasNextPage endCursor }
+    nodes {
+      ... on Repository {
+        databaseId
+        name
+        nameWithOwner
+        primaryLanguage { name }
+        createdAt
+        updatedAt
+        pushedAt
+        stargazerCount
+        forkCount
+        diskUsage
+        issues(states: OPEN) { totalCount }
+        watchers { totalCount }
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+      }
+    }
+  }
+}
+"""
+
+
+# ----------------------------------
+# 2. CONVERSION TO THE REST SHAPE
+# ----------------------------------
+
+def to_rest_item(node):
+    # Rename GraphQL fields to their REST search equivalents, so the
+    # archive, CSV columns and later stages stay the same
+    return {
+        "id": node.get("databaseId"),
+        "name": node.get("name"),
+        "full_name": node.get("nameWithOwner"),
+        "language": (node.get("primaryLanguage") or {}).get("name"),
+        "created_at": node.get("createdAt"),
+        "updated_at": node.get("updatedAt"),
+        "pushed_at": node.get("pushedAt"),
+        "stargazers_count": node.get("stargazerCount"),
+        # REST reports stars as watchers_count; real watchers are subscribers
+        "watchers_count": node.get("stargazerCount"),
+        "subscribers_count": (node.get("watchers") or {}).get("totalCount"),
+        "forks_count": node.get("forkCount"),
+        # Unlike REST, this count excludes open pull requests
+        "open_issues_count": (node.get("issues") or {}).get("totalCount"),
+        "size": node.get("diskUsage"),
+        "topics": [
+            topic["topic"]["name"]
+            for topic in (node.get("repositoryTopics") or {}).get("nodes", [])
+        ]
+    }
+
+
+# ----------------------------------
+# 3. SHARD PAGINATION
+# ----------------------------------
+
+def fetch_shard(client, query, pages, per_page=100):
+    # Walk a search query with cursors and return one REST-shaped
+    # response ({"total_count", "items"}) per page
+    # Cursors only work in order, so a shard is fetched as a whole
+    results = []
+    cursor = None
+    for _ in range(pages):
+        data = client.graphql(SEARCH_QUERY, {
+            "query": f"{query} sort:stars-desc",
+            "first": per_page,
+            "after": cursor
+        })
+        search = data["search"]
+        results.append({
+            "total_count": search["repositoryCount"],
+            "items": [to_rest_item(node) for node in search["nodes"] if node]
+        })
+
+        if not search["pageInfo"]["hasNextPage"]:
+            break
+        cursor = search["pageInfo"]["endCursor"]
+
+    # Pages planned but not returned are empty, so every unit completes
+    while len(results) < pages:
+        results.append({"total_count": 0, "items": []})
+    return results
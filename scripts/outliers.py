@@ -0,0 +1,88 @@
+from tracing import span
+
+# -------------------------------------------------------
+# Outlier detection for the cleaning step.
+# Bounds of every column are computed in one vectorized pass
+# and turned into a single boolean mask (True = keep), so the
+# data is filtered once and every column's bounds are based on
+# the same rows.
+# Bounds are either global or per group (e.g. per language),
+# where each row is compared with the bounds of its own group.
+# -------------------------------------------------------
+
+OUTLIER_METHODS = ["iqr", "mad", "percentile"]
+OUTLIER_SCOPES = ["global", "language"]
+
+# Tukey fences: Q1 - 1.5 * IQR and Q3 + 1.5 * IQR
+IQR_FACTOR = 1.5
+
+# Modified z-score cut-off, |x - median| / (1.4826 * MAD) > 3.5
+# When more than half of the values are equal the MAD is 0 and every
+# other value would be an outlier; those columns (or groups) use the
+# IQR bounds instead, and are not filtered if their IQR is 0 as well
+MAD_THRESHOLD = 3.5
+MAD_SCALE = 1.4826
+
+# Values outside the 1st-99th percentile range
+PERCENTILE_RANGE = (0.01, 0.99)
+
+
+def quantile_bounds(method, quantile):
+    # Lower and upper bounds from a quantile function q -> value(s)
+    # The function can return scalars, a Series per column or a frame
+    # aligned with the rows, so the same rule serves exact quantiles
+    # and the streaming sketches of the chunked cleaning mode
+    if method == "iqr":
+        Q1 = quantile(0.25)
+        Q3 = quantile(0.75)
+        IQR = Q3 - Q1
+        return Q1 - IQR_FACTOR * IQR, Q3 + IQR_FACTOR * IQR
+    if method == "percentile":
+        return quantile(PERCENTILE_RANGE[0]), quantile(PERCENTILE_RANGE[1])
+    raise ValueError(f"no quantile bounds for outlier method {method!r}")
+
+
+def _per_row(values, groups, func, **kwargs):
+    # Statistic of each column, global (one value per column) or of
+    # each row's group (a frame aligned with the rows)
+    if groups is None:
+        return getattr(values, func)(**kwargs)
+    return values.groupby(groups, observed=True).transform(func, **kwargs)
+
+
+def outlier_bounds(df, columns, method="iqr", by=None):
+    # Lower and upper bounds of `columns`, per row's group when `by` is set
+    values = df[columns].astype("float64")
+    groups = df[by] if by else None
+
+    if method == "mad":
+        median = _per_row(values, groups, "median")
+        mad = _per_row((values - median).abs(), groups, "median")
+        spread = MAD_THRESHOLD * MAD_SCALE * mad
+        lower, upper = median - spread, median + spread
+
+        iqr_lower, iqr_upper = quantile_bounds("iqr", lambda q: _per_row(values, groups, "quantile", q=q))
+        no_spread = mad == 0
+        no_iqr = no_spread & (iqr_upper == iqr_lower)
+        lower = lower.mask(no_spread, iqr_lower).mask(no_iqr, float("-inf"))
+        upper = upper.mask(no_spread, iqr_upper).mask(no_iqr, float("inf"))
+        return lower, upper
+
+    return quantile_bounds(method, lambda q: _per_row(values, groups, "quantile", q=q))
+
+
+def within_bounds(df, columns, lower, upper):
+    # True for rows whose values all lie within the bounds
+    values = df[columns]
+    return (values.ge(lower) & values.le(upper)).all(axis=1)
+
+
+def outlier_mask(df, columns, method="iqr", by=None):
+    # Combined keep-mask of all columns, computed without filtering copies
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"unknown outlier method {method!r}, expected one of {OUTLIER_METHODS}")
+    with span("outlier_mask", method=method, by=by, rows_in=len(df)) as record:
+        lower, upper = outlier_bounds(df, columns, method, by)
+        mask = within_bounds(df, columns, lower, upper)
+        record["rows_out"] = int(mask.sum())
+    return mask
@@ -0,0 +1,252 @@
+import io    #to parse one block of a CSV file
+import os    #to split files into blocks
+import time   #to time blocks profiled in worker processes
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait   #to profile blocks in parallel
+import numpy as np
+import pandas as pd
+from dtypes import FLOAT32_COLUMNS, integer_type
+from sketches import DuplicateSketch, HyperLogLog, Moments, QuantileSketch
+from storage import COUNT_COLUMNS, apply_schema, csv_dtypes, parquet_path, prefer_parquet
+from tracing import add_span, file_size, span
+
+# -------------------------------------------------------
+# One-pass streaming profile of a stage file (step 3)
+# The file is split into blocks (byte ranges of a CSV file at
+# line boundaries, or row groups of a Parquet file). Worker
+# processes read and profile the blocks in parallel, and the
+# per-block profiles are merged. Every statistic is a
+# mergeable accumulator of bounded size:
+# - row, null and memory counters
+# - Welford moments (mean, std, min, max) and quantile
+#   sketches of the numeric columns
+# - a HyperLogLog distinct count per column
+# - a hash-sampled duplicate row count
+# Memory is bounded by the block size times the workers, so
+# large files are profiled at the speed they can be read.
+# -------------------------------------------------------
+
+# Size of the CSV byte range read by one task
+BLOCK_BYTES = 64 << 20
+
+PERCENTILES = [0.25, 0.5, 0.75]
+
+# HyperLogLog registers (2**16): distinct counts are exact below
+# 16384 values and within about 0.4% (one standard error) above
+DISTINCT_PRECISION = 16
+
+# Odd multiplier combining the column hashes of a row
+ROW_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+# ----------------------------------
+# 1. PROFILE ACCUMULATOR
+# ----------------------------------
+
+class Profile:
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = []   # in file order
+        self.dtypes = {}
+        self.nulls = {}
+        self.memory = {}   # bytes in memory with the schema types
+        self.distinct = {}   # column -> HyperLogLog
+        self.moments = {}   # numeric column -> Moments
+        self.quantiles = {}   # numeric column -> QuantileSketch
+        self.duplicates = DuplicateSketch()
+
+    def add(self, df):
+        # Add the rows of one block
+        if not self.columns:
+            self.columns = list(df.columns)
+        self.rows += len(df)
+
+        memory = df.memory_usage(deep=True, index=False)
+        row_hashes = np.zeros(len(df), dtype="uint64")
+        for col in df.columns:
+            present = df[col].notna().to_numpy()
+            self.dtypes.setdefault(col, str(df[col].dtype))
+            self.nulls[col] = self.nulls.get(col, 0) + int((~present).sum())
+            self.memory[col] = self.memory.get(col, 0) + int(memory[col])
+
+            # Every column is hashed once (strings without factorizing
+            # them first); the hashes feed the distinct count and, combined
+            # per row, the duplicate count (as DataFrame.duplicated())
+            hashes = pd.util.hash_pandas_object(df[col], index=False, categorize=False).to_numpy()
+            self.distinct.setdefault(col, HyperLogLog(DISTINCT_PRECISION)).add(hashes[present])
+            row_hashes = row_hashes * ROW_HASH_MULTIPLIER ^ hashes
+
+            if pd.api.types.is_numeric_dtype(df[col].dtype):
+                numbers = df[col].to_numpy(dtype="float64", na_value=np.nan)
+                self.moments.setdefault(col, Moments()).add(numbers)
+                self.quantiles.setdefault(col, QuantileSketch()).add(numbers)
+
+        self.duplicates.add(row_hashes)
+        return self
+
+    def merge(self, other):
+        if not self.columns:
+            self.columns = other.columns
+        self.rows += other.rows
+        for col in other.columns:
+            self.dtypes.setdefault(col, other.dtypes[col])
+            self.nulls[col] = self.nulls.get(col, 0) + other.nulls[col]
+            self.memory[col] = self.memory.get(col, 0) + other.memory[col]
+        for accumulators, others in ((self.distinct, other.distinct), (self.moments, other.moments),
+                                     (self.quantiles, other.quantiles)):
+            for col, accumulator in others.items():
+                if col in accumulators:
+                    accumulators[col].merge(accumulator)
+                else:
+                    accumulators[col] = accumulator
+        self.duplicates.merge(other.duplicates)
+        return self
+
+    # Results in the shape of the pandas calls they replace
+
+    def dtype(self, col):
+        # Counts of a block without missing values load as int64
+        dtype = self.dtypes[col]
+        return "Int64" if dtype == "int64" and self.nulls[col] else dtype
+
+    def info(self):
+        # DataFrame.info()
+        return pd.DataFrame({
+            "Non-Null Count": [self.rows - self.nulls[col] for col in self.columns],
+            "Dtype": [self.dtype(col) for col in self.columns]
+        }, index=self.columns)
+
+    def describe(self):
+        # DataFrame.describe(), quantiles within 1% of the exact values
+        stats = {}
+        for col in self.columns:
+            if col not in self.moments:
+                continue
+            moments = self.moments[col]
+            stats[col] = [moments.count, moments.mean, moments.std(), moments.min] + [
+                self.quantiles[col].quantile(q) for q in PERCENTILES
+            ] + [moments.max]
+        index = ["count", "mean", "std", "min"] + [f"{q:.0%}" for q in PERCENTILES] + ["max"]
+        return pd.DataFrame(stats, index=index)
+
+    def null_counts(self):
+        # DataFrame.isnull().sum()
+        return pd.Series({col: self.nulls[col] for col in self.columns}, dtype="int64")
+
+    def distinct_counts(self):
+        # DataFrame.nunique(), estimated for columns with many values
+        return pd.Series({col: self.distinct[col].count() for col in self.columns}, dtype="int64")
+
+    def duplicate_count(self):
+        # DataFrame.duplicated().sum(), estimated from a sample on large files
+        return self.duplicates.count()
+
+    def memory_usage(self):
+        # DataFrame.memory_usage(deep=True) of the whole file
+        return pd.Series({col: self.memory[col] for col in self.columns}, dtype="int64")
+
+    def compact_memory_usage(self):
+        # Estimated memory after optimize_dtypes (see dtypes.py)
+        memory = self.memory_usage()
+        for col in self.columns:
+            if col in COUNT_COLUMNS and col in self.moments and self.moments[col].count:
+                moments = self.moments[col]
+                width = np.dtype(integer_type(int(moments.min), int(moments.max))).itemsize
+                # Nullable counts keep a one-byte mask per value
+                memory[col] = self.rows * (width + (1 if self.nulls[col] else 0))
+            elif col in FLOAT32_COLUMNS and self.dtypes[col] == "float64":
+                memory[col] = self.rows * 4
+        return memory
+
+
+# ----------------------------------
+# 2. BLOCKS
+# ----------------------------------
+
+def csv_blocks(path, block_bytes=BLOCK_BYTES):
+    # (start, end) byte ranges of about `block_bytes` after the header,
+    # each starting at the beginning of a line
+    # (repository names and dates never contain line breaks)
+    size = os.path.getsize(path)
+    blocks = []
+    with open(path, "rb") as file:
+        file.readline()
+        start = file.tell()
+        while start < size:
+            file.seek(min(start + block_bytes, size))
+            # Move on to the end of the line the block ends in
+            file.readline()
+            end = file.tell()
+            blocks.append((start, end))
+            start = end
+    return blocks
+
+
+def read_block(task):
+    # DataFrame of one block, with the fixed schema applied
+    kind, path, part, columns = task
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+
+        return apply_schema(pq.ParquetFile(path).read_row_group(part).to_pandas())
+
+    start, end = part
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    dtypes = {col: dtype for col, dtype in csv_dtypes().items() if col in columns}
+    df = pd.read_csv(io.BytesIO(data), header=None, names=columns, dtype=dtypes,
+                     float_precision="round_trip")
+    return apply_schema(df)
+
+
+def profile_block(task):
+    # Runs in a worker process, returns the block profile and its timings
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    profile = Profile().add(read_block(task))
+    return profile, time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+
+# ----------------------------------
+# 3. PROFILE A FILE
+# ----------------------------------
+
+def profile_file(path, workers=None, block_bytes=BLOCK_BYTES):
+    # Profile of a stage file, `path` is its CSV path (a newer .parquet
+    # version is used instead, as in read_table)
+    if prefer_parquet(path):
+        import pyarrow.parquet as pq
+
+        source = parquet_path(path)
+        tasks = [("parquet", source, group, None)
+                 for group in range(pq.ParquetFile(source).num_row_groups)]
+    else:
+        source = path
+        columns = list(pd.read_csv(path, nrows=0).columns)
+        tasks = [("csv", path, block, columns) for block in csv_blocks(path, block_bytes)]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    profile = Profile()
+    with span("profile_file", path=source, blocks=len(tasks)) as record:
+        # Only a bounded number of blocks is in flight at any time
+        task_queue = iter(tasks)
+        in_flight = set()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                for task in task_queue:
+                    in_flight.add(pool.submit(profile_block, task))
+                    if len(in_flight) >= workers * 2:
+                        break
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    block, wall, cpu = future.result()
+                    profile.merge(block)
+                    add_span("profile_block", wall_s=round(wall, 6), cpu_s=round(cpu, 6),
+                             rows_out=block.rows)
+        record["rows_out"] = profile.rows
+        record["bytes_read"] = file_size(source)
+    return profile
@@ -0,0 +1,175 @@
+import glob   #to find archive files
+import gzip   #to compress the archive when zstandard is not installed
+import io     #to read compressed streams line by line
+import json   #to store one API response per line
+import os     #to build archive paths
+from datetime import datetime, timezone   #to timestamp archived responses
+
+try:
+    import zstandard   #faster and smaller than gzip, optional
+except ImportError:
+    zstandard = None
+
+# ----------------------------------
+# 1. ARCHIVE CONFIGURATION
+# ----------------------------------
+
+# Folder holding one compressed JSONL archive per language
+ARCHIVE_DIR = "../data/raw/archive"
+
+# zstd is used when available, gzip otherwise
+ARCHIVE_SUFFIX = ".jsonl.zst" if zstandard else ".jsonl.gz"
+
+# Columns of the per-language CSV files and the repository field
+# each one is read from (dots reach into nested objects)
+REPO_FIELDS = [
+    ("repo_name", "name"),
+    ("language", "language"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+    ("stargazers_count", "stargazers_count"),
+    ("forks_count", "forks_count"),
+    ("open_issues_count", "open_issues_count"),
+    ("watchers_count", "watchers_count"),
+    ("size", "size"),
+    # Stable identity of a repository, names are not unique
+    ("repo_id", "id"),
+    ("full_name", "full_name")
+]
+
+
+# Files in the raw folder that end in _repos.csv but are not written
+# per language by the collector (merged output of step 2, step 1b)
+NON_LANGUAGE_FILES = {"all_github_repos.csv", "enriched_repos.csv"}
+
+
+def archive_path(language, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, f"{language}{ARCHIVE_SUFFIX}")
+
+
+def language_files(raw_dir="../data/raw"):
+    # Map each language to its <language>_repos.csv file
+    files = {}
+    for path in sorted(glob.glob(os.path.join(raw_dir, "*_repos.csv"))):
+        name = os.path.basename(path)
+        if name not in NON_LANGUAGE_FILES:
+            files[name[:-len("_repos.csv")]] = path
+    return files
+
+
+# ----------------------------------
+# 2. FIELD PROJECTION
+# ----------------------------------
+
+def get_field(repo, field):
+    # Read a possibly nested field such as "license.spdx_id"
+    value = repo
+    for key in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+
+    # Lists and objects are kept as JSON text in CSV cells
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def project(repo, fields=REPO_FIELDS):
+    # One CSV row from one repository object
+    return [get_field(repo, field) for _, field in fields]
+
+
+# ----------------------------------
+# 3. WRITING THE ARCHIVE
+# ----------------------------------
+
+class ArchiveWriter:
+    # Appends every raw search response of one language to its archive
+    # Each page is compressed as its own gzip member / zstd frame and
+    # flushed, so the file stays readable after a crash
+
+    def __init__(self, path, resume_offset=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.zstd = path.endswith(".zst")
+        self.file = open(path, "ab")
+        if resume_offset is not None:
+            # Drop pages archived after the last checkpointed unit
+            self.file.truncate(resume_offset)
+
+    def append(self, response, **meta):
+        # Returns the durable archive size after this page
+        record = dict(meta)
+        record["fetched_at"] = datetime.now(timezone.utc).isoformat()
+        record["response"] = response
+        line = (json.dumps(record) + "\n").encode("utf-8")
+
+        if self.zstd:
+            self.file.write(zstandard.ZstdCompressor().compress(line))
+        else:
+            self.file.write(gzip.compress(line))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+# ----------------------------------
+# 4. READING THE ARCHIVE
+# ----------------------------------
+
+# Errors raised by a page cut off by a crash (or garbage after it):
+# reading stops there, as at the end of the file
+TRUNCATED_ERRORS = (EOFError, json.JSONDecodeError, UnicodeDecodeError, gzip.BadGzipFile)
+if zstandard:
+    TRUNCATED_ERRORS += (zstandard.ZstdError,)
+
+
+def open_archive(path):
+    # Text stream over a gzip or zstd archive
+    raw = open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+    else:
+        stream = gzip.GzipFile(fileobj=raw)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def find_archives(archive_dir=ARCHIVE_DIR):
+    # Map each language to its archive file
+    archives = {}
+    for path in sorted(glob.glob(os.path.join(archive_dir, "*.jsonl.*"))):
+        language = os.path.basename(path).split(".jsonl")[0]
+        archives[language] = path
+    return archives
+
+
+def iter_records(path):
+    # One archived API response at a time, nothing else is kept in memory
+    with open_archive(path) as file:
+        try:
+            for line in file:
+                yield json.loads(line)
+        except TRUNCATED_ERRORS:
+            # A crash can truncate the last page, stop there
+            return
+
+
+def iter_repos(path):
+    # Every repository in an archive, once each
+    # Pages fetched twice (e.g. around a resumed run) are skipped by id
+    # The ids seen so far are kept in memory, one int per repository of
+    # the archive; repositories without an id are always yielded
+    seen = set()
+    for record in iter_records(path):
+        for repo in record["response"].get("items", []):
+            repo_id = repo.get("id")
+            if repo_id is not None:
+                if repo_id in seen:
+                    continue
+                seen.add(repo_id)
+            yield repo
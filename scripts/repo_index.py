@@ -0,0 +1,68 @@
+import os    #to create, truncate and sync the index file
+import numpy as np
+
+# -------------------------------------------------------
+# Deduplication index of collected repositories
+# Every repository has a stable numeric GitHub id. The
+# collector checks each row against this index before it is
+# written, so repositories returned by overlapping shards, by
+# pages that shifted while the results were re-sorted, or by
+# pages fetched again in a resumed run reach the CSV files
+# once. A lookup is one int64 set membership test.
+#
+# The ids are also appended to a binary log (int64 values)
+# that is synced together with the CSV pages. Its size is
+# checkpointed like the CSV offsets, so a resumed run restores
+# exactly the ids whose rows are on disk.
+# -------------------------------------------------------
+
+
+class RepoIndex:
+
+    def __init__(self, path=None, resume_offset=None):
+        # Without `path` the index only lives in memory
+        self.ids = set()
+        self.file = None
+        if path is None:
+            return
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if resume_offset and os.path.exists(path):
+            # Drop ids logged after the last checkpointed unit
+            with open(path, "r+b") as file:
+                file.truncate(resume_offset)
+            self.ids.update(np.fromfile(path, dtype="int64").tolist())
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, repo_id):
+        return repo_id in self.ids
+
+    def add(self, repo_id):
+        # True when `repo_id` was not indexed yet (the row should be kept)
+        # Rows without an id cannot be matched and are always kept
+        if repo_id is None:
+            return True
+        repo_id = int(repo_id)
+        if repo_id in self.ids:
+            return False
+        self.ids.add(repo_id)
+        if self.file is not None:
+            self.file.write(np.int64(repo_id).tobytes())
+        return True
+
+    def sync(self):
+        # Push logged ids to disk and return the durable log size
+        if self.file is None:
+            return 0
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        if self.file is not None and not self.file.closed:
+            self.file.close()
@@ -0,0 +1,240 @@
+import argparse   #to read command line options
+import ast   #to find the local modules a stage imports
+import hashlib   #to fingerprint stages
+import json   #to store cache manifests
+import os    #to work with paths
+import shutil   #to copy outputs in and out of the cache
+import subprocess   #to run each stage script
+import sys    #to run stages with the same Python
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait   #to run independent stages together
+from datetime import date   #to pin stages that depend on "now"
+from raw_archive import language_files
+from storage import STORAGE_FORMAT, parquet_path
+
+# -------------------------------------------------------
+# Pipeline runner for scripts 02-07
+# The stages form a DAG connected by their data files.
+# Each stage is fingerprinted from its inputs, its code and
+# its parameters; when a cached output with the same
+# fingerprint exists the stage is skipped and the cached
+# files are restored instead. Stages whose inputs are ready
+# run concurrently (e.g. 06 and 07).
+# -------------------------------------------------------
+
+# ----------------------------------
+# 1. STAGE DEFINITIONS
+# ----------------------------------
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = "../data/cache/stages"
+
+RAW_FILE = "../data/raw/all_github_repos.csv"
+CLEANED_FILE = "../data/processed/cleaned_github_repos.csv"
+FEATURED_FILE = "../data/processed/featured_github_repos.csv"
+AGGREGATES_FILE = "../data/processed/language_aggregates.csv"
+
+# Stage files follow the storage format (.csv or .parquet)
+def stage_file(path):
+    return parquet_path(path) if STORAGE_FORMAT == "parquet" else path
+
+
+def raw_language_files():
+    return list(language_files("../data/raw").values())
+
+
+# Stages with time-based features are pinned to today's date (passed
+# as GITHUB_EDA_AS_OF), so their cached output is reused within the day only
+today = date.today().isoformat()
+
+STAGES = {
+    "02": {
+        "script": "02_merge_csvs.py",
+        "after": [],
+        "inputs": raw_language_files,
+        "outputs": [stage_file(RAW_FILE)],
+        "params": {}
+    },
+    "03": {
+        "script": "03_data_understanding.py",
+        "after": ["02"],
+        "inputs": lambda: [stage_file(RAW_FILE)],
+        "outputs": [],
+        "params": {}
+    },
+    "04": {
+        "script": "04_data_cleaning.py",
+        "after": ["02"],
+        "inputs": lambda: [stage_file(RAW_FILE)],
+        "outputs": [stage_file(CLEANED_FILE)],
+        "params": {"as_of": today}
+    },
+    "05": {
+        "script": "05_feature_engineering.py",
+        "after": ["04"],
+        "inputs": lambda: [stage_file(CLEANED_FILE)],
+        "outputs": [stage_file(FEATURED_FILE), stage_file(AGGREGATES_FILE)],
+        "params": {"as_of": today}
+    },
+    "06": {
+        "script": "06_eda_analysis.py",
+        "after": ["05"],
+        "inputs": lambda: [stage_file(FEATURED_FILE), stage_file(AGGREGATES_FILE)],
+        "outputs": [
+            "../plots/figure_1_language_popularity.png",
+            "../plots/figure_2_time_activity_analysis.png",
+            "../plots/figure_3_distribution_correlation.png"
+        ],
+        "params": {}
+    },
+    "07": {
+        "script": "07_insight_visualization.py",
+        "after": ["05"],
+        "inputs": lambda: [stage_file(FEATURED_FILE), stage_file(AGGREGATES_FILE)],
+        "outputs": [
+            "../plots/01_language_popularity.png",
+            "../plots/02_watchers_comparison.png",
+            "../plots/03_engagement_ratio.png",
+            "../plots/04_rust_focus.png",
+            "../plots/05_php_maintenance.png",
+            "../plots/06_c_cpp_stability.png",
+            "../plots/07_popularity_vs_issues.png",
+            "../plots/08_star_growth.png",
+            "../plots/09_fork_behavior.png",
+            "../plots/10_ecosystem_size_vs_quality.png",
+            "../plots/11_age_vs_popularity.png",
+            "../plots/12_activity_load.png"
+        ],
+        "params": {}
+    }
+}
+
+
+# ----------------------------------
+# 2. FINGERPRINTS
+# ----------------------------------
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def local_modules(script, found=None):
+    # The stage script plus every module of this folder it imports,
+    # directly or through other local modules
+    found = found if found is not None else set()
+    if script in found:
+        return found
+    found.add(script)
+
+    with open(os.path.join(SCRIPTS_DIR, script), encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            module = name.split(".")[0] + ".py"
+            if os.path.exists(os.path.join(SCRIPTS_DIR, module)):
+                local_modules(module, found)
+    return found
+
+
+def fingerprint(name):
+    # Hash of the stage's code, inputs and parameters
+    stage = STAGES[name]
+    digest = hashlib.sha256()
+    for module in sorted(local_modules(stage["script"])):
+        digest.update(f"code:{module}:{file_hash(os.path.join(SCRIPTS_DIR, module))}\n".encode())
+    for path in stage["inputs"]():
+        digest.update(f"input:{os.path.basename(path)}:{file_hash(path)}\n".encode())
+    params = dict(stage["params"], storage_format=STORAGE_FORMAT)
+    digest.update(f"params:{json.dumps(params, sort_keys=True)}\n".encode())
+    return digest.hexdigest()
+
+
+# ----------------------------------
+# 3. RUN OR RESTORE ONE STAGE
+# ----------------------------------
+
+def restore(name, cache_path):
+    # Put the cached outputs back in place when they are missing or differ
+    with open(os.path.join(cache_path, "manifest.json"), encoding="utf-8") as file:
+        manifest = json.load(file)
+    for path, digest in manifest["outputs"].items():
+        if not os.path.exists(path) or file_hash(path) != digest:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copyfile(os.path.join(cache_path, digest), path)
+    return f"{name}: cached ({manifest['fingerprint'][:12]})"
+
+
+def run_stage(name, force):
+    stage = STAGES[name]
+    key = fingerprint(name)
+    cache_path = os.path.join(CACHE_DIR, key)
+
+    if not force and os.path.exists(os.path.join(cache_path, "manifest.json")):
+        return restore(name, cache_path)
+
+    # Non-interactive backend so figures are saved without opening windows
+    env = dict(os.environ, MPLBACKEND="Agg")
+    if "as_of" in stage["params"]:
+        # Time-based features use the pinned date of the fingerprint
+        env["GITHUB_EDA_AS_OF"] = stage["params"]["as_of"]
+    result = subprocess.run(
+        [sys.executable, stage["script"]],
+        cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"stage {name} failed:\n{result.stdout}{result.stderr}")
+
+    # Store outputs under their content hash, next to the stage log
+    os.makedirs(cache_path, exist_ok=True)
+    outputs = {}
+    for path in stage["outputs"]:
+        digest = file_hash(path)
+        shutil.copyfile(path, os.path.join(cache_path, digest))
+        outputs[path] = digest
+    with open(os.path.join(cache_path, "stdout.txt"), "w", encoding="utf-8") as file:
+        file.write(result.stdout)
+    with open(os.path.join(cache_path, "manifest.json"), "w", encoding="utf-8") as file:
+        json.dump({"stage": name, "fingerprint": key, "outputs": outputs}, file, indent=2)
+
+    return f"{name}: ran ({key[:12]})"
+
+
+# ----------------------------------
+# 4. SCHEDULE THE DAG
+# ----------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run pipeline stages 02-07 with cached outputs")
+    parser.add_argument("--force", action="store_true", help="ignore cached outputs")
+    parser.add_argument("--jobs", type=int, default=2, help="stages run at the same time")
+    args = parser.parse_args()
+
+    # Paths in the stage table are relative to the scripts folder
+    os.chdir(SCRIPTS_DIR)
+
+    done = set()
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        while len(done) < len(STAGES):
+            # Start every stage whose upstream stages have finished
+            for name, stage in STAGES.items():
+                started = name in done or name in in_flight.values()
+                if not started and all(dep in done for dep in stage["after"]):
+                    in_flight[pool.submit(run_stage, name, args.force)] = name
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = in_flight.pop(future)
+                print(future.result())
+                done.add(name)
+
+    print("Pipeline completed.")
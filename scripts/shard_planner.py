@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor   #to count shard sizes in parallel
+from datetime import date, timedelta   #to split created: date ranges
+
+# ----------------------------------
+# 1. SEARCH API LIMITS
+# ----------------------------------
+
+# GitHub Search never returns more than 1000 results for one query,
+# no matter how many pages are requested
+SEARCH_RESULT_CAP = 1000
+
+# Earliest creation date worth searching (GitHub launched in 2008)
+FIRST_CREATED_DATE = date(2008, 1, 1)
+
+
+# ----------------------------------
+# 2. SHARD HELPERS
+# ----------------------------------
+
+def shard_query(language, start, end):
+    # Search query restricted to repositories created in [start, end]
+    return f"language:{language} created:{start.isoformat()}..{end.isoformat()}"
+
+
+def shard_name(start, end):
+    # File-system friendly identifier of a date range
+    return f"{start.isoformat()}_{end.isoformat()}"
+
+
+def count_results(client, query):
+    # Ask for a single result, only total_count is needed
+    params = {"q": query, "per_page": 1}
+    return client.get("/search/repositories", params=params)["total_count"]
+
+
+# ----------------------------------
+# 3. SHARD PLANNER
+# ----------------------------------
+
+def plan_shards(client, language, start=FIRST_CREATED_DATE, end=None,
+                cap=SEARCH_RESULT_CAP, workers=4):
+    # Split a language query into created: date ranges that each
+    # return at most `cap` results
+    # Ranges above the cap are bisected and re-counted; every level
+    # of the bisection is counted in parallel
+    end = end or date.today()
+    shards = []
+    ranges = [(start, end)]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while ranges:
+            queries = [shard_query(language, *r) for r in ranges]
+            totals = list(pool.map(lambda q: count_results(client, q), queries))
+
+            next_ranges = []
+            for (range_start, range_end), query, total in zip(ranges, queries, totals):
+                if total == 0:
+                    continue
+
+                if total > cap and range_start < range_end:
+                    # Too many results: bisect the date range
+                    middle = range_start + (range_end - range_start) // 2
+                    next_ranges.append((range_start, middle))
+                    next_ranges.append((middle + timedelta(days=1), range_end))
+                    continue
+
+                if total > cap:
+                    # A single day above the cap cannot be split further
+                    print(f"  Warning: {query} has {total} results, only {cap} are reachable")
+
+                shards.append({
+                    "name": shard_name(range_start, range_end),
+                    "query": query,
+                    "total": min(total, cap)
+                })
+            ranges = next_ranges
+
+    # Oldest shards first so output order is stable between runs
+    shards.sort(key=lambda shard: shard["name"])
+    return shards
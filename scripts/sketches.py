@@ -0,0 +1,225 @@
+import math
+import numpy as np
+
+# -------------------------------------------------------
+# Mergeable streaming summaries used when the dataset does
+# not fit in memory. Each summary is updated chunk by chunk,
+# uses bounded memory and can be merged with another summary
+# built on a different part of the data.
+# -------------------------------------------------------
+
+
+class QuantileSketch:
+    # DDSketch: values are counted in logarithmic buckets, so every
+    # quantile is returned within `relative_accuracy` of the exact value
+    # Memory depends on the value range, not on the number of rows
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}   # bucket index -> count, values > 0
+        self.negative = {}   # bucket index -> count, of -value for values < 0
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_buckets(self, store, values):
+        index = np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+        buckets, counts = np.unique(index, return_counts=True)
+        for bucket, count in zip(buckets.tolist(), counts.tolist()):
+            store[bucket] = store.get(bucket, 0) + count
+
+    def add(self, values):
+        # Add a batch of values (NaN is ignored)
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        self._add_buckets(self.positive, values[values > 0])
+        self._add_buckets(self.negative, -values[values < 0])
+        self.zero_count += int((values == 0).sum())
+        self.count += len(values)
+
+    def merge(self, other):
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for bucket, count in other_store.items():
+                store[bucket] = store.get(bucket, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _bucket_value(self, bucket):
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def quantile(self, q):
+        # Value at quantile q (0-1), NaN for an empty sketch
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -self._bucket_value(bucket)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return self._bucket_value(bucket)
+        return self._bucket_value(max(self.positive))
+
+
+class Moments:
+    # Count, mean, variance, min and max of a stream of values
+    # Welford's update, applied per batch and merged with Chan's
+    # formula, so the mean and variance stay accurate for long streams
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0   # sum of squared differences from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        # Add a batch of values (NaN is ignored)
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        batch = Moments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def std(self):
+        # Sample standard deviation (ddof=1, as pandas), NaN below 2 values
+        if self.count < 2:
+            return float("nan")
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+def _bit_length(values):
+    # Bit length of uint64 values, in two 32-bit halves so the float
+    # conversion used by frexp is exact
+    high = (values >> np.uint64(32)).astype("float64")
+    low = (values & np.uint64(0xFFFFFFFF)).astype("float64")
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+class HyperLogLog:
+    # Distinct count of a stream of 64-bit hashes
+    # Each hash updates one of 2**precision registers with the position
+    # of its first set bit; the count is estimated from the registers
+    # with a standard error of 1.04 / sqrt(2**precision) (0.8% at 14)
+    # Until `sparse_limit` distinct hashes are seen they are also kept
+    # as such and the count is exact, as in the sparse mode of HLL++
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype="uint8")
+        self.sparse_limit = len(self.registers) // 4
+        self.hashes = np.empty(0, dtype="uint64")   # None once past the limit
+
+    def add(self, hashes):
+        # Add a batch of hashes (e.g. from pd.util.hash_pandas_object)
+        hashes = np.asarray(hashes, dtype="uint64")
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype("int64")
+        rank = bits + 1 - _bit_length(hashes & np.uint64((1 << bits) - 1))
+        np.maximum.at(self.registers, index, rank.astype("uint8"))
+        if self.hashes is not None:
+            # The register estimate is within a few percent here, it saves
+            # sorting large batches that cannot fit the sparse limit
+            if self._estimate() > 2 * self.sparse_limit:
+                self.hashes = None
+            else:
+                self._keep(np.union1d(self.hashes, hashes))
+
+    def _keep(self, hashes):
+        self.hashes = hashes if len(hashes) <= self.sparse_limit else None
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self.hashes is not None and other.hashes is not None:
+            self._keep(np.union1d(self.hashes, other.hashes))
+        else:
+            self.hashes = None
+        return self
+
+    def count(self):
+        if self.hashes is not None:
+            return len(self.hashes)
+        return int(round(self._estimate()))
+
+    def _estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype("int64")).sum()
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+
+class DuplicateSketch:
+    # Number of duplicate rows in a stream of row hashes
+    # Rows are sampled by hash value: only hashes below a threshold are
+    # kept, with their counts. Copies of a row share its hash, so the
+    # sample holds all of them or none, and the duplicates found in the
+    # sample, scaled by the sampling rate, estimate those of the stream.
+    # The sample starts with every row (exact count) and halves its
+    # rate whenever it holds more than `limit` distinct hashes
+
+    def __init__(self, limit=1 << 18):
+        self.limit = limit
+        self.level = 0   # sampling rate is 2 ** -level
+        self.hashes = np.empty(0, dtype="uint64")
+        self.counts = np.empty(0, dtype="int64")
+
+    def _sample(self, hashes, counts):
+        keep = (hashes >> np.uint64(64 - self.level)) == 0 if self.level else slice(None)
+        return hashes[keep], counts[keep]
+
+    def _combine(self, hashes, counts):
+        # Add (hash, count) pairs to the sample
+        hashes, counts = self._sample(np.concatenate([self.hashes, hashes]),
+                                      np.concatenate([self.counts, counts]))
+        self.hashes, inverse = np.unique(hashes, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(self.hashes)).astype("int64")
+        while len(self.hashes) > self.limit:
+            self.level += 1
+            self.hashes, self.counts = self._sample(self.hashes, self.counts)
+
+    def add(self, hashes):
+        hashes = np.asarray(hashes, dtype="uint64")
+        self._combine(hashes, np.ones(len(hashes), dtype="int64"))
+
+    def merge(self, other):
+        self.level = max(self.level, other.level)
+        self._combine(other.hashes, other.counts)
+        return self
+
+    def exact(self):
+        return self.level == 0
+
+    def count(self):
+        duplicates = int(self.counts.sum()) - len(self.hashes)
+        return duplicates << self.level
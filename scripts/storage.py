@@ -0,0 +1,248 @@
+import os    #to pick the stage file format and compare file times
+import pandas as pd
+from tracing import file_size, span
+
+# ----------------------------------
+# 1. STORAGE CONFIGURATION
+# ----------------------------------
+
+# Format used for the files handed from one stage to the next
+# "csv" keeps the original text files, "parquet" writes typed columnar
+# files next to them (same name, .parquet extension)
+STORAGE_FORMAT = os.getenv("GITHUB_EDA_FORMAT", "csv")
+
+# Fixed schema of every column that crosses a stage boundary
+# Counts and GitHub ids are int64, languages categorical and dates
+# UTC timestamps
+COUNT_COLUMNS = [
+    "stargazers_count",
+    "forks_count",
+    "open_issues_count",
+    "watchers_count",
+    "size",
+    "repo_age_days",
+    "days_since_last_update"
+]
+ID_COLUMNS = ["repo_id"]
+CATEGORY_COLUMNS = ["language", "language_source"]
+DATE_COLUMNS = ["created_at", "updated_at"]
+STRING_COLUMNS = ["repo_name", "full_name"]
+
+# Columns identifying one repository across runs and crawls
+# Data collected before repo_id was recorded falls back to the name and
+# language (see identity_columns)
+IDENTITY_COLUMNS = ["repo_id"]
+LEGACY_IDENTITY_COLUMNS = ["repo_name", "language"]
+FLOAT_COLUMNS = [
+    "stars_per_day",
+    "log_stars",
+    "log_forks",
+    "log_watchers",
+    "repo_age_years",
+    "popularity_score",
+    "engagement_ratio"
+]
+
+
+# ----------------------------------
+# 2. SCHEMA
+# ----------------------------------
+
+def apply_schema(df):
+    # Cast every known column to its schema type
+    for col in COUNT_COLUMNS + ID_COLUMNS:
+        if col in df.columns:
+            # Counts with missing values stay nullable until they are filled
+            df[col] = df[col].astype("Int64" if df[col].isna().any() else "int64")
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], utc=True, format="ISO8601")
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            # Nullable floats (e.g. from Int64 arithmetic) become NaN
+            df[col] = pd.Series(df[col].to_numpy(dtype="float64", na_value=float("nan")), index=df.index)
+    return df
+
+
+def csv_dtypes():
+    # Explicit dtypes for read_csv, so no column type is inferred
+    # Dates are kept as text here and parsed by apply_schema
+    # (read with float_precision="round_trip", so floats written by one
+    # stage are read back bit for bit)
+    dtypes = {col: "Int64" for col in COUNT_COLUMNS + ID_COLUMNS}
+    dtypes.update({col: "category" for col in CATEGORY_COLUMNS})
+    dtypes.update({col: "string" for col in STRING_COLUMNS + DATE_COLUMNS})
+    dtypes.update({col: "float64" for col in FLOAT_COLUMNS})
+    return dtypes
+
+
+def identity_columns(*frames):
+    # Key columns matching repositories in all of `frames`
+    # The GitHub id when every frame has it for every row, otherwise the
+    # (repo_name, language) pair of older data
+    if all(set(IDENTITY_COLUMNS) <= set(df.columns) and df[IDENTITY_COLUMNS].notna().all().all()
+           for df in frames):
+        return IDENTITY_COLUMNS
+    return LEGACY_IDENTITY_COLUMNS
+
+
+def fill_missing_category(series, value):
+    # fillna for categorical columns, adding the fill value as a category
+    if value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+
+def parquet_path(path):
+    return os.path.splitext(path)[0] + ".parquet"
+
+
+def table_exists(path):
+    # True when the stage file exists in either format
+    return os.path.exists(path) or os.path.exists(parquet_path(path))
+
+
+def prefer_parquet(path):
+    # The .parquet version of a stage file is used when it is the newer one
+    columnar = parquet_path(path)
+    return os.path.exists(columnar) and (
+        not os.path.exists(path) or os.path.getmtime(columnar) >= os.path.getmtime(path)
+    )
+
+
+# ----------------------------------
+# 3. READ AND WRITE STAGE FILES
+# ----------------------------------
+
+def write_table(df, path, storage_format=STORAGE_FORMAT):
+    # Save a stage output, `path` is the CSV path of the stage file
+    # Returns the path that was written
+    with span("write_table", path=path, rows_in=len(df)) as record:
+        if storage_format == "parquet":
+            path = parquet_path(path)
+            apply_schema(df.copy()).to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+        record["bytes_written"] = file_size(path)
+    return path
+
+
+def read_table(path, columns=None):
+    # Load a stage file with the fixed schema applied
+    # `path` is the CSV path; when a .parquet version exists and is newer
+    # it is read instead, and only the requested columns are loaded
+    columnar = parquet_path(path)
+    use_parquet = prefer_parquet(path)
+
+    source = columnar if use_parquet else path
+    with span("read_table", path=source) as record:
+        if use_parquet:
+            df = pd.read_parquet(columnar, columns=columns)
+        else:
+            df = pd.read_csv(path, usecols=columns, dtype=csv_dtypes(), float_precision="round_trip")
+        df = apply_schema(df)
+        record["rows_out"] = len(df)
+        record["bytes_read"] = file_size(source)
+    return df
+
+
+def iter_table(path, chunksize, columns=None):
+    # Read a stage file in chunks of `chunksize` rows, each with the
+    # fixed schema applied, so files larger than memory can be streamed
+    columnar = parquet_path(path)
+    use_parquet = prefer_parquet(path)
+
+    if use_parquet:
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(columnar).iter_batches(batch_size=chunksize, columns=columns):
+            yield apply_schema(batch.to_pandas())
+    else:
+        for chunk in pd.read_csv(path, usecols=columns, dtype=csv_dtypes(), chunksize=chunksize,
+                                 float_precision="round_trip"):
+            yield apply_schema(chunk)
+
+
+class TableWriter:
+    # Streams DataFrames into one stage file without holding them all
+    # The file is written to `<path>.part` and renamed by commit(), so
+    # readers never see a partial stage output
+    # With `columns`, every frame is aligned to that fixed schema
+    # (missing columns are written empty, others left out); without
+    # it, every frame must have the columns of the first one
+
+    def __init__(self, path, storage_format=STORAGE_FORMAT, columns=None):
+        self.format = storage_format
+        self.path = parquet_path(path) if storage_format == "parquet" else path
+        self.part_path = self.path + ".part"
+        self.columns = list(columns) if columns is not None else None
+        self.fixed = columns is not None
+        self.file = None
+        self.parquet_writer = None
+        self.rows = 0
+
+    def write(self, df):
+        # A failed write removes the partial file, the stage output is
+        # left as it was before the run
+        try:
+            self._write(df)
+        except BaseException:
+            self.abort()
+            raise
+
+    def _write(self, df):
+        if self.columns is None:
+            self.columns = list(df.columns)
+        if self.fixed:
+            df = df.reindex(columns=self.columns)
+        elif set(df.columns) != set(self.columns):
+            raise ValueError(f"columns {sorted(set(df.columns) ^ set(self.columns))} "
+                             f"are not in every frame written to {self.path}")
+        else:
+            df = df[self.columns]
+
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(
+                apply_schema(df.copy()),
+                schema=self.parquet_writer.schema if self.parquet_writer else None,
+                preserve_index=False
+            )
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.part_path, table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            header = self.file is None
+            if header:
+                self.file = open(self.part_path, "w", newline="", encoding="utf-8")
+            df.to_csv(self.file, index=False, header=header)
+
+        self.rows += len(df)
+
+    def _close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        if self.file is not None:
+            self.file.close()
+
+    def abort(self):
+        # Close and delete the partial file
+        self._close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+    def commit(self):
+        # Close the file and atomically move it into place
+        self._close()
+        os.replace(self.part_path, self.path)
+        with span("table_writer_commit", path=self.path, rows_in=self.rows) as record:
+            record["bytes_written"] = file_size(self.path)
+        return self.path
@@ -0,0 +1,117 @@
+import argparse   #to read command line options
+import os    #to create the output folder
+import numpy as np
+import pandas as pd
+from features import pinned_as_of, utc_timestamp   #dates relative to the pipeline's as-of date
+from raw_archive import REPO_FIELDS   #same columns as the collector's CSV files
+
+# -------------------------------------------------------
+# Synthetic GitHub data for benchmarks
+# Writes <language>_repos.csv files in the schema of
+# 01_collect_github_data.py at any scale (10k to 50M rows).
+# Stars follow a heavy-tailed lognormal distribution with a
+# Pareto tail; forks, watchers, issues and size are drawn
+# relative to the stars, as they are in real repositories.
+# Rows are generated and appended in chunks, so memory does
+# not grow with the number of rows.
+# Dates end at the as-of date of the pipeline run (see
+# features.pinned_as_of), so the same seed and date always
+# give the same files and no repository is younger than zero.
+# -------------------------------------------------------
+
+# Language (file name) -> display name and share of the rows
+LANGUAGES = {
+    "c": ("C", 0.08),
+    "c++": ("C++", 0.09),
+    "python": ("Python", 0.16),
+    "java": ("Java", 0.11),
+    "go": ("Go", 0.08),
+    "rust": ("Rust", 0.07),
+    "php": ("PHP", 0.07),
+    "javascript": ("JavaScript", 0.16),
+    "typescript": ("TypeScript", 0.10),
+    "c#": ("C#", 0.08)
+}
+
+CSV_COLUMNS = [column for column, _ in REPO_FIELDS]
+
+# Rows generated per chunk
+CHUNK_ROWS = 500_000
+
+FIRST_CREATED = pd.Timestamp("2008-02-01", tz="UTC")
+
+
+def generate_chunk(rng, language, start, rows, now):
+    # `rows` synthetic repositories of one language, numbered from `start`
+    name, _ = LANGUAGES[language]
+
+    # Heavy-tailed stars: lognormal body, 1% Pareto tail of large projects
+    stars = rng.lognormal(mean=2.0, sigma=2.0, size=rows)
+    tail = rng.random(rows) < 0.01
+    stars[tail] = 1000 * (rng.pareto(1.2, size=tail.sum()) + 1)
+    stars = np.minimum(stars, 500_000).astype("int64")
+
+    # Forks are a noisy fraction of the stars, issues grow sub-linearly
+    forks = (stars * rng.beta(1.5, 8.0, size=rows)).astype("int64")
+    issues = (np.sqrt(stars) * rng.lognormal(0.0, 1.0, size=rows)).astype("int64")
+    size = rng.lognormal(mean=8.0, sigma=2.0, size=rows).astype("int64")
+
+    # Creation dates spread over GitHub's lifetime, updates after creation
+    # and mostly recent
+    span = (now - FIRST_CREATED).total_seconds()
+    created_s = rng.random(rows) * span
+    updated_s = created_s + (span - created_s) * (1 - rng.beta(1.0, 6.0, size=rows))
+    created_at = FIRST_CREATED + pd.to_timedelta(created_s.astype("int64"), unit="s")
+    updated_at = FIRST_CREATED + pd.to_timedelta(updated_s.astype("int64"), unit="s")
+
+    ids = np.arange(start, start + rows)
+    names = [f"{language}-repo-{i}" for i in ids]
+    df = pd.DataFrame({
+        "repo_name": names,
+        "language": name,
+        "created_at": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "updated_at": updated_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "stargazers_count": stars,
+        "forks_count": forks,
+        "open_issues_count": issues,
+        "watchers_count": stars,
+        "size": size,
+        # GitHub ids are unique over all languages
+        "repo_id": list(LANGUAGES).index(language) * 10**9 + ids,
+        "full_name": [f"owner-{i // 1000}/{name}" for i, name in zip(ids, names)]
+    })
+    return df[CSV_COLUMNS]
+
+
+def generate(rows, output_dir, seed=0, as_of=None, chunk_rows=CHUNK_ROWS):
+    # Write about `rows` repositories split over the language files,
+    # created and updated before `as_of` (default: GITHUB_EDA_AS_OF)
+    # Returns {language: rows written}
+    rng = np.random.default_rng(seed)
+    now = (pinned_as_of() if as_of is None else utc_timestamp(as_of)).floor("D")
+    os.makedirs(output_dir, exist_ok=True)
+
+    written = {}
+    for language, (_, share) in LANGUAGES.items():
+        total = int(round(rows * share))
+        path = os.path.join(output_dir, f"{language}_repos.csv")
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            for start in range(0, max(total, 1), chunk_rows):
+                count = min(chunk_rows, total - start)
+                generate_chunk(rng, language, start, count, now).to_csv(
+                    file, index=False, header=start == 0
+                )
+        written[language] = total
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic GitHub repository CSV files")
+    parser.add_argument("--rows", type=int, default=10_000, help="total number of repositories")
+    parser.add_argument("--output-dir", default="../data/raw", help="folder for the <language>_repos.csv files")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--as-of", help="latest creation/update date (default: GITHUB_EDA_AS_OF or today)")
+    args = parser.parse_args()
+
+    written = generate(args.rows, args.output_dir, args.seed, args.as_of)
+    print(f"Wrote {sum(written.values())} synthetic repositories to {args.output_dir}")
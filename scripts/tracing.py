@@ -0,0 +1,226 @@
+import argparse   #to read command line options of the report
+import atexit   #to write the trace when the script ends
+import glob   #to find trace files for the report
+import json   #to write and read traces
+import os    #to read the trace setting and file sizes
+import sys    #to name the traced script
+import threading   #to keep one span stack per thread
+import time   #to measure wall and CPU time
+from contextlib import contextmanager
+
+try:
+    import resource   #peak memory (not available on Windows)
+except ImportError:
+    resource = None
+
+# -------------------------------------------------------
+# Opt-in tracing for scripts 01-07
+# With GITHUB_EDA_TRACE set ("1" for the default folder, or a
+# folder path), every script writes one JSON trace per run.
+# The trace holds nested spans (stage -> sub-step) with wall
+# and CPU time, rows in/out, bytes read/written and peak RSS,
+# plus point events such as HTTP requests and rate-limit
+# waits. Without the variable every call is a cheap no-op.
+#
+# Summary of one or more traces:
+#   python tracing.py [trace files or folders]
+# -------------------------------------------------------
+
+TRACE_DIR = "../data/traces"
+
+_setting = os.getenv("GITHUB_EDA_TRACE", "")
+ENABLED = _setting not in ("", "0")
+
+_local = threading.local()
+_lock = threading.Lock()
+_spans = []
+_events = []
+_started = time.time()
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _stack():
+    # Spans of worker threads are nested under the script's root span
+    if not hasattr(_local, "stack"):
+        _local.stack = _spans[:1]
+    return _local.stack
+
+
+# ----------------------------------
+# 1. RECORDING
+# ----------------------------------
+
+class _NoSpan(dict):
+    # Stand-in when tracing is off, attributes set on it are dropped
+    def __setitem__(self, key, value):
+        pass
+
+
+@contextmanager
+def span(name, **attrs):
+    # Time a block; the yielded dict takes extra attributes such as
+    # rows_out or bytes_written:
+    #     with span("outliers", rows_in=len(df)) as s:
+    #         ...
+    #         s["rows_out"] = len(df)
+    if not ENABLED:
+        yield _NoSpan()
+        return
+
+    stack = _stack()
+    record = dict(attrs, name=name, parent=stack[-1]["id"] if stack else None,
+                  thread=threading.current_thread().name)
+    with _lock:
+        record["id"] = len(_spans) + 1
+        _spans.append(record)
+    stack.append(record)
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    record["start"] = round(time.time() - _started, 6)
+    try:
+        yield record
+    finally:
+        record["wall_s"] = round(time.perf_counter() - start_wall, 6)
+        # Process CPU time, it includes other threads running meanwhile
+        record["cpu_s"] = round(time.process_time() - start_cpu, 6)
+        record["peak_rss_mb"] = _peak_rss_mb()
+        stack.pop()
+
+
+def event(name, **attrs):
+    # Record a point event (e.g. one HTTP request) under the current span
+    if not ENABLED:
+        return
+    stack = _stack()
+    record = dict(attrs, name=name, parent=stack[-1]["id"] if stack else None,
+                  at=round(time.time() - _started, 6))
+    with _lock:
+        _events.append(record)
+
+
+def add_span(name, **attrs):
+    # Record a span measured elsewhere (e.g. in a worker process)
+    if not ENABLED:
+        return
+    stack = _stack()
+    with _lock:
+        _spans.append(dict(attrs, name=name, id=len(_spans) + 1,
+                           parent=stack[-1]["id"] if stack else None,
+                           thread=threading.current_thread().name))
+
+
+def file_size(path):
+    # Size of a file for bytes_read / bytes_written, 0 if missing
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+# ----------------------------------
+# 2. WRITING THE TRACE
+# ----------------------------------
+
+def _write_trace():
+    script = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+    root = _spans[0] if _spans else None
+    if root is not None and "wall_s" not in root:
+        # The script-level span ends here
+        root["wall_s"] = round(time.perf_counter() - _root_wall, 6)
+        root["cpu_s"] = round(time.process_time() - _root_cpu, 6)
+        root["peak_rss_mb"] = _peak_rss_mb()
+
+    trace_dir = TRACE_DIR if _setting == "1" else _setting
+    os.makedirs(trace_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(_started))
+    path = os.path.join(trace_dir, f"{stamp}-{script}-{os.getpid()}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({
+            "script": script,
+            "argv": sys.argv[1:],
+            "pid": os.getpid(),
+            "started": _started,
+            "spans": _spans,
+            "events": _events
+        }, file, indent=1)
+
+
+if ENABLED and __name__ != "__main__":
+    # One root span per traced script, from import to exit
+    _root_wall = time.perf_counter()
+    _root_cpu = time.process_time()
+    _spans.append({
+        "id": 1, "parent": None, "start": 0.0, "thread": "MainThread",
+        "name": os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+    })
+    _local.stack = [_spans[0]]
+    atexit.register(_write_trace)
+
+
+# ----------------------------------
+# 3. SUMMARY REPORT
+# ----------------------------------
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def report(trace):
+    # Print where the time of one traced run went
+    spans = trace["spans"]
+    root = spans[0]
+    total = root.get("wall_s") or 0.0
+    print(f"== {trace['script']} {' '.join(trace['argv'])}".rstrip())
+    print(f"   wall {total:.2f}s  cpu {root.get('cpu_s', 0):.2f}s  peak RSS {root.get('peak_rss_mb')} MB")
+
+    # Spans with the same name are summed (e.g. one per page or figure)
+    totals = {}
+    for record in spans[1:]:
+        entry = totals.setdefault(record["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                                   "rows_out": 0, "bytes": 0})
+        entry["count"] += 1
+        entry["wall_s"] += record.get("wall_s", 0.0)
+        entry["cpu_s"] += record.get("cpu_s", 0.0)
+        entry["rows_out"] += record.get("rows_out", 0) or 0
+        entry["bytes"] += (record.get("bytes_read", 0) or 0) + (record.get("bytes_written", 0) or 0)
+
+    print(f"   {'step':<44}{'count':>6}{'wall s':>10}{'share':>8}{'cpu s':>10}{'rows out':>12}{'MB io':>9}")
+    for name, entry in sorted(totals.items(), key=lambda item: -item[1]["wall_s"])[:15]:
+        share = entry["wall_s"] / total if total else 0
+        print(f"   {name:<44}{entry['count']:>6}{entry['wall_s']:>10.2f}{share:>8.0%}"
+              f"{entry['cpu_s']:>10.2f}{entry['rows_out']:>12}{entry['bytes'] / 1e6:>9.1f}")
+
+    # HTTP latency and rate-limit waits of the collector
+    requests = [e for e in trace["events"] if e["name"] == "http_request"]
+    if requests:
+        latencies = [e["latency_s"] for e in requests]
+        print(f"   HTTP: {len(requests)} requests, latency p50 {_percentile(latencies, 0.5):.3f}s "
+              f"p95 {_percentile(latencies, 0.95):.3f}s max {max(latencies):.3f}s")
+    waits = [e for e in trace["events"] if e["name"] == "rate_limit_wait"]
+    if waits:
+        print(f"   Rate-limit waits: {len(waits)}, {sum(e['seconds'] for e in waits):.1f}s in total")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize pipeline traces")
+    parser.add_argument("paths", nargs="*", default=[TRACE_DIR], help="trace files or folders")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path])
+    if not files:
+        raise SystemExit("No trace files found (run the scripts with GITHUB_EDA_TRACE=1)")
+
+    for path in files:
+        with open(path, encoding="utf-8") as file:
+            report(json.load(file))
@@ -0,0 +1,6 @@
+import os    #to locate the scripts folder
+import sys    #to import the helper modules of the scripts
+
+# The pipeline helpers live next to the scripts and are imported by
+# plain module name, as the scripts do when run from scripts/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
@@ -0,0 +1,140 @@
+import json   #to encode response bodies
+import threading   #to serve requests next to the test
+import time   #to compute rate-limit reset times
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# -------------------------------------------------------
+# Local stand-in for the GitHub API used by the client tests
+# - GET /search/repositories: paginated results with ETags
+#   (If-None-Match is answered with 304)
+# - POST /graphql: cursor-paginated search, every query costs
+#   `graphql_cost` points of a shared points budget
+# - any other path answers 404
+# Scripted responses (rate limits, errors) can be queued per
+# path and are served before the default handlers. Every
+# request is recorded with its token, so tests can check what
+# the client sent.
+# -------------------------------------------------------
+
+SEARCH_RESULTS = 25
+
+
+class StubGitHub:
+
+    def __init__(self, per_page=10, remaining=5000, graphql_cost=1):
+        self.per_page = per_page
+        self.remaining = remaining   # reported for every default REST response
+        self.graphql_cost = graphql_cost
+        self.points = remaining   # GraphQL points left
+        self.requests = []   # (method, path, params, headers, body)
+        self.scripted = {}   # path -> list of (status, headers, body)
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self, "GET")
+
+            def do_POST(self):
+                stub.handle(self, "POST")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def script(self, path, status, headers=None, body=None):
+        # Queue one response for the next request to `path`
+        with self.lock:
+            self.scripted.setdefault(path, []).append((status, headers or {}, body))
+
+    def calls(self, path=None):
+        return [request for request in self.requests if path is None or request[1] == path]
+
+    def tokens(self, path=None):
+        # Token sent with each request to `path`, in order
+        return [request[3].get("Authorization", "").replace("Bearer ", "") or None
+                for request in self.calls(path)]
+
+    def rate_headers(self, resource, remaining=None):
+        return {
+            "X-RateLimit-Remaining": str(self.remaining if remaining is None else remaining),
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+            "X-RateLimit-Resource": resource
+        }
+
+    # ----------------------------------
+    # REQUEST HANDLING
+    # ----------------------------------
+
+    def handle(self, handler, method):
+        url = urlparse(handler.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length)) if length else None
+        with self.lock:
+            self.requests.append((method, url.path, params, dict(handler.headers), body))
+            queued = self.scripted.get(url.path)
+            scripted = queued.pop(0) if queued else None
+
+        if scripted is not None:
+            status, headers, response = scripted
+        elif url.path == "/search/repositories":
+            status, headers, response = self.search(params, handler.headers.get("If-None-Match"))
+        elif url.path == "/graphql":
+            status, headers, response = self.graphql(body)
+        else:
+            status, headers, response = 404, {}, {"message": "Not Found"}
+
+        data = b"" if response is None else (
+            response.encode() if isinstance(response, str) else json.dumps(response).encode()
+        )
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def search(self, params, etag):
+        # REST search page, the ETag only depends on the page
+        page = int(params.get("page", 1))
+        per_page = int(params.get("per_page", self.per_page))
+        headers = dict(self.rate_headers("search"), ETag=f'"{params.get("q")}-{page}-{per_page}"')
+        if etag == headers["ETag"]:
+            return 304, headers, None
+        first = (page - 1) * per_page
+        items = [{"id": i, "full_name": f"owner/repo{i}"}
+                 for i in range(first, min(first + per_page, SEARCH_RESULTS))]
+        return 200, headers, {"total_count": SEARCH_RESULTS, "items": items}
+
+    def graphql(self, body):
+        # GraphQL search page, cursors are result offsets
+        variables = body.get("variables") or {}
+        first = int(variables.get("after") or 0)
+        end = min(first + int(variables.get("first", self.per_page)), SEARCH_RESULTS)
+        nodes = [{"databaseId": i, "nameWithOwner": f"owner/repo{i}", "name": f"repo{i}"}
+                 for i in range(first, end)]
+        with self.lock:
+            self.points -= self.graphql_cost
+            points = self.points
+        data = {"search": {
+            "repositoryCount": SEARCH_RESULTS,
+            "pageInfo": {"hasNextPage": end < SEARCH_RESULTS, "endCursor": str(end)},
+            "nodes": nodes
+        }}
+        if "rateLimit" in body["query"]:
+            data["rateLimit"] = {"cost": self.graphql_cost, "remaining": points, "resetAt": None}
+        return 200, self.rate_headers("graphql", points), {"data": data}
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from features import add_features, update_features
+from storage import IDENTITY_COLUMNS, LEGACY_IDENTITY_COLUMNS, identity_columns, read_table, write_table
+
+AS_OF = pd.Timestamp("2026-01-01", tz="UTC")
+
+# Features of step 5
+FEATURE_NAMES = [
+    "log_stars",
+    "log_forks",
+    "log_watchers",
+    "repo_age_years",
+    "days_since_last_update",
+    "popularity_score",
+    "engagement_ratio"
+]
+
+
+def cleaned(rows, seed=0):
+    # Rows in the schema of the cleaned dataset (step 4 output)
+    rng = np.random.default_rng(seed)
+    created = pd.Timestamp("2012-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 3000, rows), unit="D")
+    stars = rng.integers(0, 5000, rows)
+    return pd.DataFrame({
+        "repo_name": [f"repo{i % 50}" for i in range(rows)],
+        "language": pd.Categorical(rng.choice(["C", "Go", "Rust"], rows)),
+        "created_at": created,
+        "updated_at": created + pd.to_timedelta(rng.integers(1, 500, rows), unit="D"),
+        "stargazers_count": stars,
+        "forks_count": rng.integers(0, 500, rows),
+        "open_issues_count": rng.integers(0, 50, rows),
+        "watchers_count": stars,
+        "size": rng.integers(1, 10_000, rows),
+        "repo_id": np.arange(rows) + 1_000_000
+    })
+
+
+def round_trip(df, tmp_path, name):
+    # Through a stage file, as step 5 reads its previous output
+    return read_table(write_table(df, str(tmp_path / f"{name}.csv"), storage_format="csv"))
+
+
+@pytest.mark.parametrize("key_columns", [IDENTITY_COLUMNS, LEGACY_IDENTITY_COLUMNS])
+def test_incremental_update_equals_full_run(tmp_path, key_columns):
+    base = cleaned(400)
+    if key_columns == LEGACY_IDENTITY_COLUMNS:
+        base = base.drop(columns="repo_id").drop_duplicates(LEGACY_IDENTITY_COLUMNS)
+    previous = base.copy()
+    add_features(previous, FEATURE_NAMES, AS_OF)
+    previous = round_trip(previous, tmp_path, "featured")
+
+    # Next crawl: some repositories changed, some are gone, some are new
+    current = base.iloc[20:].copy()
+    current.loc[current.index[:30], "stargazers_count"] += 100
+    current.loc[current.index[:30], "updated_at"] += pd.Timedelta(days=1)
+    new = cleaned(440, seed=1).iloc[400:]
+    if key_columns == LEGACY_IDENTITY_COLUMNS:
+        new = new.drop(columns="repo_id").assign(repo_name=[f"new{i}" for i in range(len(new))])
+    current = round_trip(pd.concat([current, new], ignore_index=True), tmp_path, "cleaned")
+    assert identity_columns(current, previous) == key_columns
+
+    expected = current.copy()
+    add_features(expected, FEATURE_NAMES, AS_OF)
+    changed = update_features(current, previous, FEATURE_NAMES, key_columns, AS_OF)
+
+    assert changed == 30 + len(new)
+    assert current[FEATURE_NAMES].notna().all().all()
+    pd.testing.assert_frame_equal(current, expected)
@@ -0,0 +1,172 @@
+import threading
+import time
+
+import pytest
+from github_client import GitHubClient, GitHubError, RateLimiter, ResponseCache, rate_limit_resource
+from graphql_backend import fetch_shard
+from stub_server import SEARCH_RESULTS, StubGitHub
+
+
+def make_client(stub, tokens=("token-a",), **options):
+    options.setdefault("max_retries", 3)
+    options.setdefault("secondary_wait", 0.01)
+    return GitHubClient(list(tokens), base_url=stub.url, **options)
+
+
+def primary_limit(reset_in, resource="core"):
+    return {
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": str(int(time.time() + reset_in)),
+        "X-RateLimit-Resource": resource
+    }
+
+
+# ----------------------------------
+# PAGINATION AND CACHING
+# ----------------------------------
+
+def test_search_pages_cover_all_results():
+    with StubGitHub() as stub:
+        client = make_client(stub)
+        ids = []
+        for page in range(1, 4):
+            data = client.get("/search/repositories", {"q": "language:Python", "per_page": 10, "page": page})
+            assert data["total_count"] == SEARCH_RESULTS
+            ids += [item["id"] for item in data["items"]]
+    assert ids == list(range(SEARCH_RESULTS))
+
+
+def test_graphql_cursor_pagination():
+    with StubGitHub() as stub:
+        pages = fetch_shard(make_client(stub), "language:Python", pages=4, per_page=10)
+        cursors = [body["variables"]["after"] for _, _, _, _, body in stub.calls("/graphql")]
+    assert [len(page["items"]) for page in pages] == [10, 10, 5, 0]
+    assert [item["id"] for page in pages for item in page["items"]] == list(range(SEARCH_RESULTS))
+    # The last planned page is padded, not requested
+    assert cursors == [None, "10", "20"]
+
+
+def test_etag_revalidation_serves_cached_body(tmp_path):
+    params = {"q": "language:Go", "per_page": 10, "page": 2}
+    with StubGitHub() as stub:
+        client = make_client(stub, cache=ResponseCache(str(tmp_path)))
+        first = client.get("/search/repositories", params)
+        second = client.get("/search/repositories", params)
+        sent = [headers.get("If-None-Match") for _, _, _, headers, _ in stub.calls()]
+    assert second == first
+    assert sent == [None, '"language:Go-2-10"']
+
+
+def test_replay_never_uses_the_network(tmp_path):
+    params = {"q": "language:Go", "page": 1}
+    with StubGitHub() as stub:
+        make_client(stub, cache=ResponseCache(str(tmp_path))).get("/search/repositories", params)
+        replay = GitHubClient(["token-a"], base_url=stub.url, cache=ResponseCache(str(tmp_path)), replay=True)
+        assert replay.get("/search/repositories", params)["total_count"] == SEARCH_RESULTS
+        with pytest.raises(GitHubError):
+            replay.get("/search/repositories", {"q": "language:Rust", "page": 1})
+        assert len(stub.calls()) == 1
+
+
+# ----------------------------------
+# PRIMARY AND SECONDARY LIMITS
+# ----------------------------------
+
+def test_primary_limit_moves_on_to_another_token():
+    with StubGitHub() as stub:
+        stub.script("/search/repositories", 403, primary_limit(3600, "search"), {"message": "API rate limit exceeded"})
+        client = make_client(stub, tokens=("token-a", "token-b"))
+        client.get("/search/repositories", {"q": "x"})
+        client.get("/search/repositories", {"q": "y"})
+        tokens = stub.tokens()
+    first = tokens[0]
+    other = "token-b" if first == "token-a" else "token-a"
+    # The spent token is not used again before its reset
+    assert tokens[1:] == [other, other]
+
+
+def test_primary_limit_waits_for_the_reset():
+    with StubGitHub() as stub:
+        stub.script("/search/repositories", 403, primary_limit(2, "search"), {"message": "API rate limit exceeded"})
+        start = time.time()
+        make_client(stub).get("/search/repositories", {"q": "x"})
+        assert len(stub.calls()) == 2
+    assert time.time() - start >= 0.9
+
+
+def test_secondary_limit_honours_retry_after():
+    with StubGitHub() as stub:
+        stub.script("/search/repositories", 403, {"Retry-After": "1"}, {"message": "slow down"})
+        start = time.time()
+        make_client(stub).get("/search/repositories", {"q": "x"})
+        assert len(stub.calls()) == 2
+    assert time.time() - start >= 0.9
+
+
+def test_secondary_limit_without_retry_after_backs_off():
+    with StubGitHub() as stub:
+        stub.script("/search/repositories", 403, {}, {"message": "You have exceeded a secondary rate limit."})
+        stub.script("/search/repositories", 429, {}, {"message": "Too Many Requests"})
+        data = make_client(stub).get("/search/repositories", {"q": "x"})
+        assert len(stub.calls()) == 3
+    assert data["total_count"] == SEARCH_RESULTS
+
+
+def test_other_client_errors_are_not_retried():
+    with StubGitHub() as stub:
+        stub.script("/search/repositories", 403, {"X-RateLimit-Remaining": "4999"}, {"message": "Resource not accessible"})
+        stub.script("/repos/owner/private", 401, {"Retry-After": "30"}, {"message": "Bad credentials"})
+        client = make_client(stub)
+        with pytest.raises(GitHubError):
+            client.get("/search/repositories", {"q": "x"})
+        assert client.request("/repos/owner/private").status_code == 401
+        assert len(stub.calls()) == 2
+
+
+def test_limits_are_kept_per_resource():
+    with StubGitHub() as stub:
+        # The search quota of the only token is spent, core requests go on
+        stub.script("/search/repositories", 403, primary_limit(3600, "search"), {"message": "API rate limit exceeded"})
+        client = make_client(stub, max_retries=0)
+        with pytest.raises(GitHubError):
+            client.get("/search/repositories", {"q": "x"})
+        start = time.time()
+        assert client.request("/repos/owner/repo").status_code == 404
+        assert time.time() - start < 1
+    limiter = client.tokens.limiters[0]
+    assert limiter.quota("search") == 0
+    assert limiter.available_at(time.time(), "search") > time.time() + 3000
+
+
+def test_limiter_uses_the_resource_reported_by_the_server():
+    class Response:
+        headers = {"X-RateLimit-Remaining": "7", "X-RateLimit-Reset": "100", "X-RateLimit-Resource": "code_search"}
+
+    limiter = RateLimiter("token-a", threading.Lock())
+    limiter.update(Response(), rate_limit_resource("/search/code"))
+    assert limiter.quota("code_search") == 7
+    assert limiter.quota("core") == float("inf")
+    assert [rate_limit_resource(path) for path in ("/graphql", "search/repositories", "/repos/a/b")] == [
+        "graphql", "search", "core"
+    ]
+
+
+# ----------------------------------
+# GRAPHQL COST ACCOUNTING
+# ----------------------------------
+
+def test_graphql_cost_is_reserved_from_the_points_quota():
+    with StubGitHub(graphql_cost=3) as stub:
+        client = make_client(stub)
+        fetch_shard(client, "language:Rust", pages=3, per_page=10)
+        limiter = client.tokens.limiters[0]
+        # Three queries of 3 points, tracked apart from the core quota
+        assert client.tokens.costs["graphql"] == 3
+        assert limiter.quota("graphql") == 5000 - 9
+        assert limiter.quota("core") == float("inf")
+
+        # A query is only sent when the token has its cost left
+        limiter.window("graphql")["remaining"] = 2
+        limiter.window("graphql")["reset_at"] = time.time() + 3600
+        assert limiter.available_at(time.time(), "graphql", 3) > time.time() + 3000
+        assert limiter.available_at(time.time(), "core") <= time.time()